@@ -40,6 +40,9 @@ REST_FRAMEWORK = {
 
 # Middleware
 MIDDLEWARE = [
+    # Outermost, so they time everything below
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Static file support
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -50,6 +53,18 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Share of requests that get Server-Timing headers and a timing log line (0 disables)
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv("INSTRUMENTATION_SAMPLE_RATE", "1.0" if DEBUG else "0.05"))
+
+# Bearer token required by /metrics; unset leaves it open (e.g. behind a private network)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Run the MV/CVaR/ERC solves of an analysis concurrently in a process pool,
+# each with a wall-clock budget in seconds (over-budget solves are left out)
+RISK_ANALYSIS_PARALLEL = os.getenv("RISK_ANALYSIS_PARALLEL", "False").lower() == "true"
+RISK_ANALYSIS_SOLVE_TIMEOUT = float(os.getenv("RISK_ANALYSIS_SOLVE_TIMEOUT", "30"))
+RISK_ANALYSIS_WORKERS = int(os.getenv("RISK_ANALYSIS_WORKERS", "3"))
+
 ROOT_URLCONF = "admin.urls"
 
 # Templates (not used in API, but required)
@@ -76,6 +91,26 @@ DATABASES = {
     "default": dj_database_url.config(conn_max_age=600)
 }
 
+# Cache
+# The Alpha Vantage quota, single-flight locks and /metrics counters live in the
+# cache and are only shared between gunicorn workers on a backend with atomic
+# add()/incr(). Set REDIS_URL in production (manage.py check --deploy fails
+# without it); the local-memory fallback is per process and only suits a
+# single-process development server.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -108,3 +143,18 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Logging
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api": {
+            "handlers": ["console"],
+            "level": os.getenv("API_LOG_LEVEL", "INFO"),
+        },
+    },
+}
@@ -18,9 +18,21 @@ from django.contrib import admin
 from django.urls import path, include
 
 from api.auth.views import LoginAPIView, LogoutAPIView
+from api.fund_manager.views import FundManagerRiskAPIView
 from api.institute.models import Institute
+from api.institute.views import InstituteRiskAPIView
+from api.metrics.views import MetricsView
 from api.portfolio.models import FundManager, Portfolio
-from api.portfolio.views import AnalyzePortfolioAPIView, PortfolioRiskAPIView
+from api.portfolio.views import (
+    AnalyzePortfolioAPIView,
+    AnalysisJobAPIView,
+    PortfolioFrontierAPIView,
+    PortfolioHistoryExportAPIView,
+    PortfolioRiskAPIView,
+    PortfolioRollingRiskAPIView,
+    PortfolioWhatIfRiskAPIView,
+    RiskJobAPIView,
+)
 
 from api.stock.models import Stock
 
@@ -32,8 +44,24 @@ admin.site.register(Stock)
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("api/login/", LoginAPIView.as_view(), name="login"),
     path("api/logout/", LogoutAPIView.as_view(), name="logout"),
     path('api/portfolio/<int:portfolio_id>/analyze/', AnalyzePortfolioAPIView.as_view(), name='analyze-portfolio'),
-    path("api/portfolio/<int:portfolio_id>/risk/", PortfolioRiskAPIView.as_view(), name="portfolio-risk")
+    path('api/portfolio/<int:portfolio_id>/analyze/jobs/<int:job_id>/', AnalysisJobAPIView.as_view(),
+         name='analyze-portfolio-job'),
+    path("api/portfolio/<int:portfolio_id>/risk/", PortfolioRiskAPIView.as_view(), name="portfolio-risk"),
+    path("api/portfolio/<int:portfolio_id>/risk/jobs/<int:job_id>/", RiskJobAPIView.as_view(),
+         name="portfolio-risk-job"),
+    path("api/portfolio/<int:portfolio_id>/risk/rolling/", PortfolioRollingRiskAPIView.as_view(),
+         name="portfolio-rolling-risk"),
+    path("api/portfolio/<int:portfolio_id>/risk/what-if/", PortfolioWhatIfRiskAPIView.as_view(),
+         name="portfolio-what-if-risk"),
+    path("api/portfolio/<int:portfolio_id>/frontier/", PortfolioFrontierAPIView.as_view(),
+         name="portfolio-frontier"),
+    path("api/portfolio/<int:portfolio_id>/history/export/", PortfolioHistoryExportAPIView.as_view(),
+         name="portfolio-history-export"),
+    path("api/fund-manager/<int:fund_manager_id>/risk/", FundManagerRiskAPIView.as_view(),
+         name="fund-manager-risk"),
+    path("api/institute/<int:institute_id>/risk/", InstituteRiskAPIView.as_view(), name="institute-risk"),
 ]
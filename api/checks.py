@@ -0,0 +1,23 @@
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+
+# Backends one cache server backs for every process, with atomic add()/incr().
+# LocMemCache is per process; DatabaseCache and FileBasedCache incr() with a
+# get then a set, so concurrent increments are lost.
+SHARED_CACHE_BACKENDS = (RedisCache, BaseMemcachedCache)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The Alpha Vantage quota buckets and the /metrics counters rely on the
+    default cache being shared by all workers; ``check --deploy`` fails without it.
+    """
+    if isinstance(caches["default"], SHARED_CACHE_BACKENDS):
+        return []
+    message = "The default cache is not shared by all worker processes with atomic incr()."
+    hint = ("Set REDIS_URL. Without it each worker enforces its own Alpha Vantage "
+            "quota and /metrics only reports the worker that served the scrape.")
+    return [checks.Error(message, hint=hint, id="api.E001")]
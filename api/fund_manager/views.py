@@ -1,8 +1,14 @@
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from api.fund_manager.models import FundManager
 from api.fund_manager.serializers import FundManagerSerializer
+from api.portfolio.utils.batchrisk import batch_portfolio_risk, parse_alpha
 
 
 class FundManagerViewSet(viewsets.ModelViewSet):
@@ -15,3 +21,26 @@ class FundManagerViewSet(viewsets.ModelViewSet):
         if FundManager.objects.filter(user_id=user).exists():
             return Response({"error": "This user is already a FundManager."}, status=status.HTTP_400_BAD_REQUEST)
         return super().create(request, *args, **kwargs)
+
+
+class FundManagerRiskAPIView(APIView):
+    """
+    Risk of every portfolio of a fund manager, plus their combined book,
+    from one read of their history (see batch_portfolio_risk). Fund managers see
+    their own; admins see any.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fund_manager_id):
+        fund_manager = get_object_or_404(FundManager, id=fund_manager_id)
+        if fund_manager.user_id != request.user.id and not request.user.is_staff:
+            raise Http404
+
+        try:
+            alpha = parse_alpha(request.query_params)
+        except ValueError:
+            return Response({"detail": "alpha must be a number in (0, 1)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = batch_portfolio_risk(fund_manager.portfolios.order_by("id"), alpha)
+        return Response({"fund_manager_id": fund_manager.id, **result})
@@ -1,11 +1,38 @@
-from rest_framework import viewsets
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
+from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from api.institute.models import Institute
 from api.institute.serializers import InstituteSerializer
+from api.portfolio.models import Portfolio
+from api.portfolio.utils.batchrisk import batch_portfolio_risk, parse_alpha
 
 
 class InstituteViewSet(viewsets.ModelViewSet):
     queryset = Institute.objects.all()
     serializer_class = InstituteSerializer
     permission_classes = [IsAdminUser]  # Only admin users can access this endpoint
+
+
+class InstituteRiskAPIView(APIView):
+    """
+    Risk of every portfolio of every fund manager of an institute, plus the
+    institute's combined book, from one read of their history (see batch_portfolio_risk).
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, institute_id):
+        institute = get_object_or_404(Institute, id=institute_id)
+
+        try:
+            alpha = parse_alpha(request.query_params)
+        except ValueError:
+            return Response({"detail": "alpha must be a number in (0, 1)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        portfolios = Portfolio.objects.filter(fund_manager__institute=institute).order_by("fund_manager_id", "id")
+        result = batch_portfolio_risk(portfolios, alpha)
+        return Response({"institute_id": institute.id, **result})
@@ -0,0 +1,43 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    ACTIVE_STATUSES = [Status.PENDING, Status.RUNNING]
+    DEFAULT_QUEUE = "default"
+
+    queue = models.CharField(max_length=50, default=DEFAULT_QUEUE)
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)  # Dedupe key, e.g. the symbol
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)  # Handler return value
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'key'],
+                condition=Q(status__in=['pending', 'running']),
+                name='unique_active_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['queue', 'status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key} ({self.status})"
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.jobs.models import Job
+
+BACKOFF_BASE_SECONDS = 30
+STALE_RUNNING_AFTER = timedelta(minutes=10)  # Reclaim jobs from crashed workers
+
+HANDLERS = {}
+
+
+def register(kind, on_failure=None):
+    """
+    Register the function that runs jobs of ``kind``.
+    The job payload is passed as keyword arguments. ``on_failure`` is called
+    with the same arguments once the job has used up all its attempts.
+    """
+    def decorator(func):
+        HANDLERS[kind] = (func, on_failure)
+        return func
+    return decorator
+
+
+def enqueue(kind, key, payload=None, max_attempts=5, queue=Job.DEFAULT_QUEUE):
+    """
+    Queue a job unless one for the same (kind, key) is already pending or running.
+    Workers can be dedicated to a ``queue`` so slow jobs don't hold up fast ones.
+    :return: The new or already active Job
+    """
+    active = Job.objects.filter(kind=kind, key=key, status__in=Job.ACTIVE_STATUSES)
+    if (job := active.first()) is not None:
+        return job
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                queue=queue, kind=kind, key=key, payload=payload or {}, max_attempts=max_attempts)
+    except IntegrityError:
+        # Lost the race against another enqueue of the same job
+        return active.first()
+
+
+def claim_next(queues=None, batch=10):
+    """
+    Atomically move one due job to RUNNING, optionally only from ``queues``.
+    The conditional UPDATE works the same on SQLite and Postgres, so two
+    workers can never claim the same job.
+    """
+    now = timezone.now()
+    claimable = (
+        Q(status=Job.Status.PENDING, run_after__lte=now) |
+        Q(status=Job.Status.RUNNING, updated_at__lt=now - STALE_RUNNING_AFTER)
+    )
+
+    jobs = Job.objects.filter(claimable)
+    if queues:
+        jobs = jobs.filter(queue__in=queues)
+
+    for job in jobs.only("pk", "status", "updated_at")[:batch]:
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, updated_at=job.updated_at
+        ).update(status=Job.Status.RUNNING, attempts=F("attempts") + 1, updated_at=now)
+        if claimed:
+            return Job.objects.get(pk=job.pk)
+    return None
+
+
+def run_job(job):
+    """
+    Run a claimed job, then mark it DONE or reschedule it with exponential backoff.
+    The handler's return value is stored on the job.
+    """
+    handler, on_failure = HANDLERS[job.kind]
+
+    try:
+        job.result = handler(**job.payload)
+    except Exception as e:
+        job.last_error = str(e)
+        if job.attempts >= job.max_attempts:
+            job.status = Job.Status.FAILED
+            if on_failure is not None:
+                on_failure(**job.payload)
+        else:
+            job.status = Job.Status.PENDING
+            job.run_after = timezone.now() + timedelta(
+                seconds=BACKOFF_BASE_SECONDS * 2 ** (job.attempts - 1))
+    else:
+        job.status = Job.Status.DONE
+        job.last_error = ""
+
+    job.save(update_fields=["status", "run_after", "last_error", "result", "updated_at"])
+    return job
@@ -0,0 +1,60 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.services.history import bulk_upsert_history
+from api.services.models import HistoricalStockData
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare per-row update_or_create ingestion with bulk_upsert_history. All writes are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=5000)
+        parser.add_argument("--symbol", default="BENCH")
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        symbol = options["symbol"]
+        start = date(2000, 1, 1)
+        rows = [(start + timedelta(days=i), 100.0 + i * 0.01) for i in range(days)]
+        revised = [(d, price * 1.001) for d, price in rows]
+
+        self.stdout.write(f"Ingesting {days} days for {symbol}")
+        for label, ingest in (("per-row", self._per_row), ("bulk", self._bulk)):
+            insert_time, update_time = self._run(ingest, symbol, rows, revised)
+            self.stdout.write(
+                f"{label:>8}: insert {insert_time:.3f}s, update {update_time:.3f}s"
+            )
+
+    def _run(self, ingest, symbol, rows, revised):
+        timings = []
+        try:
+            with transaction.atomic():
+                for batch in (rows, revised):
+                    started = time.perf_counter()
+                    ingest(symbol, batch)
+                    timings.append(time.perf_counter() - started)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return timings
+
+    @staticmethod
+    def _per_row(symbol, rows):
+        for date_obj, price in rows:
+            HistoricalStockData.objects.update_or_create(
+                symbol=symbol,
+                date=date_obj,
+                defaults={"adjusted_close": price}
+            )
+
+    @staticmethod
+    def _bulk(symbol, rows):
+        bulk_upsert_history(symbol, rows)
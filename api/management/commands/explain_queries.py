@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from api.jobs.models import Job
+from api.portfolio.models import Portfolio
+from api.services.models import HistoricalStockData
+from api.stock.models import Stock
+
+
+def _hot_queries(user_id, portfolio_id, symbols):
+    """
+    The queries behind the request and worker hot paths, keyed by a short label.
+    """
+    today = date.today()
+    now = timezone.now()
+    return {
+        "stock list for a user": Stock.objects.filter(
+            portfolio__fund_manager__user_id=user_id, portfolio_id=portfolio_id),
+        "stock by portfolio and symbol": Stock.objects.filter(
+            portfolio_id=portfolio_id, symbol=symbols[0]),
+        "price matrix build": HistoricalStockData.objects.filter(symbol__in=symbols).order_by().values_list(
+            "date", "symbol", "adjusted_close"),
+        "history for a portfolio": HistoricalStockData.objects.for_portfolio(
+            Portfolio(pk=portfolio_id)).values_list("date", "adjusted_close"),
+        "history export window": HistoricalStockData.objects.filter(
+            symbol__in=symbols, date__range=(today - timedelta(days=365), today),
+        ).order_by("symbol", "date").values_list("symbol", "date", "adjusted_close"),
+        "history high-water mark": HistoricalStockData.objects.filter(
+            symbol=symbols[0]).values("symbol").annotate(latest=Max("date")),
+        "job claim": Job.objects.filter(
+            queue__in=[Job.DEFAULT_QUEUE], status=Job.Status.PENDING, run_after__lte=now,
+        ).only("pk", "status", "updated_at")[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = "Print the database's query plans for the hot queries, to check they use the indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--portfolio", type=int, help="Portfolio id to plan against. Defaults to the first one.")
+        parser.add_argument(
+            "--user", type=int,
+            help="User id for the per-user queries. Defaults to the portfolio's owner, else the first user.")
+        parser.add_argument(
+            "--analyze", action="store_true",
+            help="Run the queries and report actual timings (Postgres only).")
+
+    def handle(self, *args, **options):
+        portfolio_id = options["portfolio"] or Portfolio.objects.values_list("pk", flat=True).first() or 1
+        symbols = list(
+            Stock.objects.filter(portfolio_id=portfolio_id).values_list("symbol", flat=True)) or ["AAPL"]
+        user_id = (
+            options["user"]
+            or Portfolio.objects.filter(pk=portfolio_id).values_list("fund_manager__user_id", flat=True).first()
+            or User.objects.values_list("pk", flat=True).first()
+            or 1
+        )
+
+        # SQLite only understands EXPLAIN QUERY PLAN; Postgres takes options
+        explain_options = {}
+        if connection.vendor == "postgresql" and options["analyze"]:
+            explain_options = {"analyze": True, "buffers": True}
+
+        self.stdout.write(f"{connection.vendor}, user {user_id}, portfolio {portfolio_id}, {len(symbols)} symbols")
+        for label, queryset in _hot_queries(user_id, portfolio_id, symbols).items():
+            self.stdout.write(f"\n== {label}")
+            self.stdout.write(queryset.explain(**explain_options))
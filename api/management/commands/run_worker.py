@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.jobs.queue import claim_next, run_job
+import api.portfolio.tasks  # noqa: F401  registers the analysis handler
+import api.stock.tasks  # noqa: F401  registers the history fetch handler
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue", action="append", dest="queues",
+            help="Only run jobs from this queue (repeatable). Defaults to all queues.")
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when idle.")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next(options["queues"])
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+
+            job = run_job(job)
+            self.stdout.write(f"{job.kind}:{job.key} -> {job.status} (attempt {job.attempts})")
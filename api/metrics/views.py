@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+
+from api.services.metrics import render_metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape target. When METRICS_TOKEN is set, scrapers must send
+    it as ``Authorization: Bearer <token>``.
+    """
+
+    def get(self, request):
+        token = getattr(settings, "METRICS_TOKEN", None)
+        if token:
+            supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+            if not hmac.compare_digest(supplied.encode(), token.encode()):
+                return HttpResponse("Unauthorized\n", status=401, content_type=CONTENT_TYPE)
+        return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
@@ -0,0 +1,101 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from api.services.instrumentation import RequestMetrics, collecting
+from api.services.metrics import REQUEST_DURATION
+
+logger = logging.getLogger("api.requests")
+
+
+class _QueryTimer:
+    """connection.execute_wrapper hook adding every SQL statement to the request's "db" stage."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.record("db", time.perf_counter() - started)
+
+
+def _server_timing(metrics, total):
+    entries = []
+    for stage, seconds in sorted(metrics.durations.items()):
+        entries.append(f'{stage};dur={seconds * 1000:.1f};desc="{metrics.calls[stage]}x"')
+    hits = metrics.counters.get("cache_hits", 0)
+    misses = metrics.counters.get("cache_misses", 0)
+    if hits or misses:
+        entries.append(f'cache;desc="{hits} hits, {misses} misses"')
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class InstrumentationMiddleware:
+    """
+    Record SQL, cache, upstream and analysis stage timings for a sample of
+    requests. Sampled responses carry a Server-Timing header and produce one
+    JSON log line on the "api.requests" logger.
+    INSTRUMENTATION_SAMPLE_RATE (0..1) sets the sampled share; 0 turns it off.
+    Streamed bodies are produced after the response leaves the middleware, so
+    their queries are not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, "INSTRUMENTATION_SAMPLE_RATE", 1.0)
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        with collecting(metrics), ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_QueryTimer(metrics)))
+            response = self.get_response(request)
+
+        total = metrics.elapsed()
+        response["Server-Timing"] = _server_timing(metrics, total)
+
+        match = getattr(request, "resolver_match", None)
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 1),
+            "queries": metrics.calls.get("db", 0),
+            "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in metrics.durations.items()},
+            "calls": dict(metrics.calls),
+            "counters": dict(metrics.counters),
+        }, sort_keys=True))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Observe the latency of every request into the shared request histogram,
+    labelled by URL name (unresolved paths share one label to bound cardinality).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            view=(match.view_name if match else None) or "unmatched",
+            method=request.method)
+        return response
@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import Max
+
+
+def collapse_to_symbol_series(apps, schema_editor):
+    """
+    Keep one row per (symbol, date); the most recently written copy wins.
+    """
+    HistoricalStockData = apps.get_model('api', 'HistoricalStockData')
+    keep_ids = (
+        HistoricalStockData.objects
+        .values('symbol', 'date')
+        .annotate(keep_id=Max('id'))
+        .values_list('keep_id', flat=True)
+    )
+    HistoricalStockData.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0002_alter_stock_unique_together'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='historicalstockdata',
+            unique_together=set(),
+        ),
+        migrations.RunPython(collapse_to_symbol_series, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='historicalstockdata',
+            name='portfolio',
+        ),
+        migrations.AlterUniqueTogether(
+            name='historicalstockdata',
+            unique_together={('symbol', 'date')},
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_history_ready(apps, schema_editor):
+    Stock = apps.get_model('api', 'Stock')
+    HistoricalStockData = apps.get_model('api', 'HistoricalStockData')
+    Stock.objects.filter(
+        symbol__in=HistoricalStockData.objects.values('symbol')
+    ).update(history_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_shared_historical_stock_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='history_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_history_ready, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=255)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['run_after'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='api_job_status_84fd39_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('kind', 'key'), name='unique_active_job')],
+            },
+        ),
+    ]
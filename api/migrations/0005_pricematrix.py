@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_job_stock_history_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceMatrix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbols', models.JSONField()),
+                ('columns', models.JSONField()),
+                ('dates', models.BinaryField()),
+                ('prices', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('portfolio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='price_matrix', to='api.portfolio')),
+            ],
+        ),
+    ]
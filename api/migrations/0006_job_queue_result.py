@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_pricematrix'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='job',
+            name='api_job_status_84fd39_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='queue',
+            field=models.CharField(default='default', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='result',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['queue', 'status', 'run_after'], name='api_job_queue_debd42_idx'),
+        ),
+    ]
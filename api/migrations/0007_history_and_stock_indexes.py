@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_job_queue_result'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalstockdata',
+            index=models.Index(fields=['symbol', 'date', 'adjusted_close'], name='hist_symbol_date_close_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['portfolio', 'symbol'], name='stock_portfolio_symbol_idx'),
+        ),
+    ]
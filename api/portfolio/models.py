@@ -14,3 +14,23 @@ class Portfolio(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.fund_manager.user.username})"
+
+
+class PriceMatrix(models.Model):
+    """
+    Materialized date x symbol adjusted-close matrix of a portfolio's holdings.
+    Stored as raw float64/datetime64 buffers so the analysis views can load it
+    in a single read instead of re-pivoting every history row.
+    """
+    portfolio = models.OneToOneField(
+        Portfolio,
+        on_delete=models.CASCADE,
+        related_name="price_matrix")
+    symbols = models.JSONField()  # Holdings the matrix was built for
+    columns = models.JSONField()  # Holdings that had history
+    dates = models.BinaryField()  # datetime64[D]
+    prices = models.BinaryField()  # float64, row-major (dates x columns)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.portfolio.name} ({len(self.columns)} symbols)"
@@ -8,3 +8,22 @@ class PortfolioSerializer(serializers.ModelSerializer):
         model = Portfolio
         fields = ['id', 'name', 'description', 'fund_manager', 'created_at']
         read_only_fields = ['created_at']
+
+
+class WhatIfSerializer(serializers.Serializer):
+    MAX_CANDIDATES = 1000
+
+    candidates = serializers.ListField(
+        child=serializers.DictField(child=serializers.FloatField()),
+        min_length=1, max_length=MAX_CANDIDATES)
+    alpha = serializers.FloatField(default=0.05)
+
+    def validate_alpha(self, value):
+        if not 0 < value < 1:
+            raise serializers.ValidationError("alpha must be in (0, 1).")
+        return value
+
+    def validate_candidates(self, value):
+        if any(not any(weights.values()) for weights in value):
+            raise serializers.ValidationError("Every candidate needs at least one non-zero weight.")
+        return value
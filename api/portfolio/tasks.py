@@ -0,0 +1,57 @@
+from urllib.parse import urlencode
+
+from api.jobs.queue import enqueue, register
+from api.portfolio.models import Portfolio
+from api.portfolio.utils.analysis import analyze_portfolio
+from api.portfolio.utils.montecarlo import monte_carlo_risk
+from api.portfolio.utils.pricematrix import load_price_matrix
+
+ANALYZE_PORTFOLIO = "analyze_portfolio"
+MONTE_CARLO_RISK = "monte_carlo_risk"
+ANALYSIS_QUEUE = "analysis"
+
+
+@register(ANALYZE_PORTFOLIO)
+def run_portfolio_analysis(portfolio_id, series_options=None):
+    return analyze_portfolio(Portfolio.objects.get(id=portfolio_id), series_options)
+
+
+def enqueue_portfolio_analysis(portfolio, series_options=None):
+    """
+    Queue a full analysis of ``portfolio`` on the dedicated analysis queue,
+    so heavy solves never delay history fetches. Failures are not retried;
+    the optimizations are deterministic.
+    """
+    key = str(portfolio.id)
+    if series_options:
+        key += ":" + urlencode(sorted(series_options.items()))
+
+    return enqueue(
+        ANALYZE_PORTFOLIO,
+        key,
+        payload={"portfolio_id": portfolio.id, "series_options": series_options},
+        max_attempts=1,
+        queue=ANALYSIS_QUEUE)
+
+
+@register(MONTE_CARLO_RISK)
+def run_monte_carlo_risk(portfolio_id, simulation):
+    portfolio = Portfolio.objects.get(id=portfolio_id)
+    price_matrix = load_price_matrix(portfolio, [stock.symbol for stock in portfolio.stocks.all()])
+    X = price_matrix.ffill().pct_change().dropna()
+    weights = {symbol: 1 / len(X.columns) for symbol in X.columns}
+    return {"portfolio_id": portfolio.id, "risk_measures": monte_carlo_risk(X, weights, **simulation)}
+
+
+def enqueue_monte_carlo_risk(portfolio, simulation):
+    """
+    Queue a simulation too large to run within a request (see SYNC_MAX_DRAWS)
+    on the analysis queue. The view has already checked that the portfolio
+    has returns to simulate.
+    """
+    return enqueue(
+        MONTE_CARLO_RISK,
+        f"{portfolio.id}:{urlencode(sorted(simulation.items()))}",
+        payload={"portfolio_id": portfolio.id, "simulation": simulation},
+        max_attempts=1,
+        queue=ANALYSIS_QUEUE)
@@ -0,0 +1,126 @@
+import pandas as pd
+from django.utils.timezone import now
+
+from api.portfolio.utils.pricematrix import load_price_matrix
+from api.portfolio.utils.riskanalysis import perform_risk_analysis, calculate_risk_measures
+from api.portfolio.utils.timeseries import shape_series
+from api.services.alphavantage import get_cached_live_prices
+from api.services.instrumentation import timed
+
+
+def analyze_portfolio(portfolio, series_options=None):
+    """
+    Build the full analysis payload of a portfolio: holdings priced live,
+    historical series, optimized weights and per-symbol risk measures.
+    :param series_options: Chart shaping options (see parse_series_options); they
+        only apply to historical_data and portfolio_value, the analysis itself
+        always uses the full history
+    :return: JSON-ready dictionary
+    """
+    stocks = portfolio.stocks.all()
+
+    stock_data = []
+    total_value = 0
+    stock_symbols = []
+
+    with timed("live_prices"):
+        live_prices = get_cached_live_prices([stock.symbol for stock in stocks])
+
+    for stock in stocks:
+        manual_price = stock.price
+        live_price = live_prices.get(stock.symbol)
+
+        price = manual_price or live_price
+        if price is not None:
+            stock_total = price * stock.quantity
+            total_value += stock_total
+            stock_symbols.append(stock.symbol)
+
+            stock_data.append({
+                'name': stock.name,
+                'symbol': stock.symbol,
+                'quantity': stock.quantity,
+                'manual_price': float(manual_price) if manual_price else None,
+                'live_price': float(live_price) if live_price else None,
+                'total_value': float(stock_total),
+            })
+
+    price_matrix = load_price_matrix(portfolio, [stock.symbol for stock in stocks])
+
+    if price_matrix.empty:
+        return {
+            "message": "No historical data available for this portfolio.",
+            "stock_data": stock_data,
+            "total_value": float(total_value),
+            "historical_data": {},
+            "risk_measures": {},
+            "portfolio_analysis": {},
+            "portfolio_value": [],
+            "timestamp": int(now().timestamp())
+        }
+
+    pivot_df = price_matrix.dropna()
+    available_symbols = pivot_df.columns.tolist()
+    filtered_symbols = [s for s in stock_symbols if s in available_symbols]
+
+    if not filtered_symbols:
+        return {"message": "None of the stocks have valid historical data."}
+
+    values = (pivot_df[filtered_symbols] * pd.Series({
+        stock.symbol: stock.quantity for stock in stocks if stock.symbol in filtered_symbols
+    })).sum(axis=1)
+    portfolio_values = shape_series(values, series_options)
+
+    # LTTB picks different dates for each series; when it thinned the portfolio
+    # value, the symbols reuse its dates over the window they share so the
+    # series stay aligned when merged
+    keep = None
+    if series_options and "max_points" in series_options:
+        undecimated = shape_series(values, {k: v for k, v in series_options.items() if k != "max_points"})
+        if len(portfolio_values) < len(undecimated):
+            keep = portfolio_values.index
+
+    historical_data = {}
+    for symbol in filtered_symbols:
+        prices = shape_series(price_matrix[symbol].dropna(), series_options, keep=keep)
+        historical_data[symbol] = {
+            "dates": prices.index.astype(str).tolist(),
+            "prices": prices.tolist()
+        }
+
+    X = pivot_df[filtered_symbols].pct_change().dropna()
+    if X.empty:
+        return {"message": "Not enough historical data to compute returns."}
+
+    portfolio_analysis = perform_risk_analysis(X)
+    risk_measures = calculate_risk_measures(X, filtered_symbols)
+
+    if not portfolio_analysis:
+        return {"message": "Portfolio optimization failed due to insufficient data."}
+
+    optimized = {
+        "mean_variance": portfolio_analysis.get("mean_variance", {}),
+        "cvar": portfolio_analysis.get("cvar", {}),
+        "erc": portfolio_analysis.get("erc", {}),
+    }
+    if "timed_out" in portfolio_analysis:
+        optimized["timed_out"] = portfolio_analysis["timed_out"]  # Solves left out after their time budget
+
+    portfolio_value_json = portfolio_values.reset_index()
+    portfolio_value_json["date"] = portfolio_value_json["date"].astype(str)
+    portfolio_value_json.columns = ["x", "y"]
+    portfolio_value_json = portfolio_value_json.to_dict(orient="records")
+
+    return {
+        "portfolio": {
+            "id": portfolio.id,
+            "name": portfolio.name,
+        },
+        "stock_data": stock_data,
+        "total_value": float(total_value),
+        "historical_data": historical_data,
+        "portfolio_analysis": optimized,
+        "risk_measures": risk_measures,
+        "portfolio_value": portfolio_value_json,
+        "timestamp": int(now().timestamp())
+    }
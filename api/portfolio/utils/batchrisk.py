@@ -0,0 +1,132 @@
+import numpy as np
+
+from api.portfolio.utils.pricematrix import build_price_matrix
+from api.portfolio.utils.riskanalysis import confidence_label, historical_var_cvar
+from api.services.instrumentation import timed
+from api.stock.models import Stock
+
+
+def parse_alpha(params):
+    """
+    :return: The ``alpha`` query parameter (default 0.05)
+    :raises ValueError: When it is not a number in (0, 1)
+    """
+    alpha = float(params.get("alpha", 0.05))
+    if not 0 < alpha < 1:
+        raise ValueError("alpha must be in (0, 1)")
+    return alpha
+
+
+def _measures(std_dev, var, cvar, alpha):
+    label = confidence_label(alpha)
+    return {
+        "Std_Dev": float(std_dev),
+        f"VaR_{label}": float(var),
+        f"CVaR_{label}": float(cvar),
+    }
+
+
+def _windowed_returns(prices, weights):
+    """
+    Returns of every weight column in one pass. Each column's window is the one
+    PortfolioRiskAPIView derives from a price matrix of only its symbols: the
+    dates any of them has a price for, forward-filled, then only the dates with
+    a return for all of them. Forward-filling the whole matrix leaves the
+    values on those dates unchanged, so the returns are taken once and each
+    window is applied as a row mask over the single returns x weights product.
+    :param prices: Price matrix (dates x symbols)
+    :param weights: Array (symbols x columns), zero for symbols not held
+    :return: (product, masks), both dates x columns
+    """
+    returns = prices.ffill().pct_change().to_numpy(dtype=np.float64)
+    valid = ~np.isnan(returns)
+    held = (weights != 0).astype(np.float64)
+    complete = valid.astype(np.float64) @ held == held.sum(axis=0)
+    priced = prices.notna().to_numpy(dtype=np.float64) @ held > 0
+    return np.where(valid, returns, 0.0) @ weights, complete & priced
+
+
+def _series_risk(dates, series, alpha):
+    if len(series) < 2:
+        return {"detail": "Not enough historical data to compute returns."}
+
+    var, cvar = historical_var_cvar(series[:, None], alpha)
+    return {
+        "start": str(dates[0].date()),
+        "end": str(dates[-1].date()),
+        "observations": len(series),
+        "risk_measures": _measures(series.std(ddof=1), var[0], cvar[0], alpha),
+    }
+
+
+def batch_portfolio_risk(portfolios, alpha=0.05):
+    """
+    Risk of many portfolios from one read of their history.
+    The history of every symbol they hold is pivoted once and turned into
+    returns once; all portfolios, with the aggregate as one more column, are
+    then priced by a single matrix product. Each portfolio keeps its own
+    window, so its figures match PortfolioRiskAPIView, and portfolios holding
+    the same symbols share a column. Weights are equal over the holdings with
+    history, like PortfolioRiskAPIView, and the aggregate is the whole book
+    weighted by market value (quantity x last price) over the window of all
+    its symbols.
+    :param portfolios: Iterable of Portfolio
+    :param alpha: Significance level of VaR/CVaR
+    :return: Dictionary with per-portfolio and aggregate risk measures
+    """
+    portfolios = list(portfolios)
+    holdings = {portfolio.id: {} for portfolio in portfolios}
+    for portfolio_id, symbol, quantity in Stock.objects.filter(portfolio__in=portfolios).values_list(
+            "portfolio_id", "symbol", "quantity"):
+        holdings[portfolio_id][symbol] = holdings[portfolio_id].get(symbol, 0) + quantity
+
+    prices = build_price_matrix(sorted({symbol for held in holdings.values() for symbol in held}))
+    last_prices = prices.ffill().iloc[-1] if len(prices) else None
+    position = {symbol: i for i, symbol in enumerate(prices.columns)}
+
+    result = {"alpha": alpha, "portfolios": [], "aggregate": None}
+    with timed("batch_risk"):
+        columns = {}  # Covered symbols -> weight column
+        covered_by = {}
+        book = {}
+        for portfolio in portfolios:
+            covered = tuple(sorted(symbol for symbol in holdings[portfolio.id] if symbol in position))
+            covered_by[portfolio.id] = covered
+            if covered:
+                columns.setdefault(covered, len(columns))
+                for symbol in covered:
+                    book[symbol] = book.get(symbol, 0.0) + holdings[portfolio.id][symbol] * last_prices[symbol]
+
+        book_value = sum(book.values())
+        weights = np.zeros((len(position), len(columns) + 1))
+        for covered, column in columns.items():
+            weights[[position[symbol] for symbol in covered], column] = 1 / len(covered)
+        if book_value > 0:
+            for symbol, value in book.items():
+                weights[position[symbol], -1] = value / book_value
+
+        risks = []
+        if columns:
+            product, masks = _windowed_returns(prices, weights)
+            risks = [
+                _series_risk(prices.index[masks[:, column]], product[masks[:, column], column], alpha)
+                for column in range(weights.shape[1])
+            ]
+
+        for portfolio in portfolios:
+            covered = covered_by[portfolio.id]
+            entry = {
+                "portfolio_id": portfolio.id,
+                "fund_manager_id": portfolio.fund_manager_id,
+                "name": portfolio.name,
+                "symbols": len(covered),
+            }
+            if covered:
+                entry.update(risks[columns[covered]])
+            else:
+                entry["detail"] = "No valid stocks with historical data for risk calculation."
+            result["portfolios"].append(entry)
+
+        if book_value > 0:
+            result["aggregate"] = {"market_value": float(book_value), **risks[-1]}
+    return result
@@ -0,0 +1,126 @@
+import cvxpy as cp
+import numpy as np
+import riskfolio as rp
+from django.core.cache import cache
+
+from api.portfolio.utils.riskanalysis import ANALYSIS_CACHE_TIMEOUT, ANALYSIS_PARAMS, returns_fingerprint
+from api.portfolio.utils.solvers import build_portfolio
+from api.services.instrumentation import count, timed
+
+FRONTIER_RISK_MEASURES = ("MV", "CVaR")
+# The CVaR frontier is a linear program; simplex re-solves from the previous
+# basis, where the interior-point default starts over at every point
+LP_SOLVERS = ["HIGHS"]
+DEFAULT_FRONTIER_POINTS = 20
+MAX_FRONTIER_POINTS = 100
+
+
+def _max_return_problem(mu, returns, cov, rm, alpha):
+    """
+    Long-only, fully invested max-return problem under a risk ceiling, the
+    same program riskfolio solves for each frontier point (obj="MaxRet" with
+    upperdev/upperCVaR). The ceiling is a cvxpy Parameter, so the problem is
+    canonicalized once and re-solved per point.
+    :return: (problem, weights variable, ceiling parameter)
+    """
+    n = len(mu)
+    w = cp.Variable(n)
+    ceiling = cp.Parameter(nonneg=True)
+    constraints = [cp.sum(w) == 1, w >= 0]
+
+    if rm == "MV":
+        # G @ G.T == cov, also when cov is singular (more assets than days)
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        G = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+        constraints.append(cp.norm(G.T @ w, 2) <= ceiling)
+    else:
+        T = len(returns)
+        var = cp.Variable()
+        z = cp.Variable(T)
+        constraints += [z >= 0, z >= -returns @ w - var, var + cp.sum(z) / (alpha * T) <= ceiling]
+
+    return cp.Problem(cp.Maximize(mu @ w), constraints), w, ceiling
+
+
+def _risk(w, returns, cov, rm, alpha):
+    if rm == "MV":
+        return float(np.sqrt(w @ cov @ w))
+    return float(rp.CVaR_Hist(returns @ w, alpha=alpha))
+
+
+def _solve(problem, solvers):
+    for solver in solvers:
+        try:
+            problem.solve(solver=solver, warm_start=True)
+        except (cp.SolverError, ValueError):
+            continue
+        if problem.status in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+            return True
+    return False
+
+
+def _solve_frontier(X, rm, points, method_mu, method_cov, model, rf, hist):
+    port = build_portfolio(X, method_mu, method_cov)
+    mu = port.mu.to_numpy(dtype=np.float64).ravel()
+    cov = port.cov.to_numpy(dtype=np.float64)
+    returns = port.returns.to_numpy(dtype=np.float64)
+    alpha = port.alpha
+
+    # Ends of the frontier: minimum-risk and maximum-return portfolios
+    limits = port.frontier_limits(model=model, rm=rm, rf=rf, hist=hist)
+    w_min = limits.iloc[:, 0].to_numpy(dtype=np.float64)
+    w_max = limits.iloc[:, 1].to_numpy(dtype=np.float64)
+
+    problem, w, ceiling = _max_return_problem(mu, returns, cov, rm, alpha)
+    solvers = (LP_SOLVERS if rm == "CVaR" else []) + port.solvers
+    solvers = [solver for solver in solvers if solver in cp.installed_solvers()]
+
+    frontier, failed = [w_min], 0
+    targets = np.linspace(_risk(w_min, returns, cov, rm, alpha), _risk(w_max, returns, cov, rm, alpha), points)
+    for target in targets[1:-1]:
+        ceiling.value = target
+        if _solve(problem, solvers):
+            frontier.append(np.clip(w.value, 0, None))
+        else:
+            failed += 1
+    frontier.append(w_max)
+
+    symbols = X.columns.tolist()
+    return failed, [
+        {
+            "risk": _risk(weights, returns, cov, rm, alpha),
+            "return": float(mu @ weights),
+            "weights": dict(zip(symbols, (float(x) for x in weights))),
+        }
+        for weights in frontier
+    ]
+
+
+def efficient_frontier(X, rm="MV", points=DEFAULT_FRONTIER_POINTS):
+    """
+    Efficient frontier of a returns matrix for the MV or CVaR risk measure.
+    Both ends come from rp.Portfolio.frontier_limits. The points between them
+    are evenly spaced in risk, and one parametrized max-return problem solves
+    them all, so a 50-point frontier costs a few single solves rather than
+    the 50 full problem builds of rp.Portfolio.efficient_frontier. Complete
+    results are cached under the returns fingerprint; a frontier with points
+    that failed to solve is not, so a transient solver failure isn't served
+    until the cache expires.
+    :param X: DataFrame of historical returns
+    :param rm: "MV" (risk is volatility) or "CVaR" (historical, alpha 0.05)
+    :param points: Number of frontier points (points that fail to solve are left out)
+    :return: List of {risk, return, weights} ordered by increasing risk
+    """
+    cache_key = f"frontier:{returns_fingerprint(X, rm=rm, points=points, **ANALYSIS_PARAMS)}"
+    if (cached := cache.get(cache_key)) is not None:
+        count("frontier_cache_hits")
+        return cached
+
+    count("frontier_cache_misses")
+    with timed(f"frontier_{rm.lower()}"):
+        failed, result = _solve_frontier(X, rm, points, **ANALYSIS_PARAMS)
+    if failed:
+        count("frontier_points_failed", failed)
+    else:
+        cache.set(cache_key, result, timeout=ANALYSIS_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,183 @@
+import math
+
+import numpy as np
+
+from api.portfolio.utils.riskanalysis import confidence_label
+from api.services.instrumentation import timed
+
+MONTE_CARLO_METHODS = ("parametric", "bootstrap")
+DEFAULT_SCENARIOS = 100_000
+MAX_SCENARIOS = 5_000_000
+MAX_HORIZON = 252  # one trading year
+DEFAULT_BLOCK = 5
+CHUNK_ELEMENTS = 2_000_000  # float64s drawn per chunk (16 MB)
+SYNC_MAX_DRAWS = 20_000_000  # larger simulations run as a background job
+
+
+def parse_monte_carlo_options(params):
+    """
+    Read the simulation options of the risk endpoint from query parameters.
+    :param params: Mapping with optional method (historical/parametric/bootstrap),
+        scenarios, alpha, seed, horizon and block
+    :return: Keyword arguments for monte_carlo_risk, or None for the historical method
+    :raises ValueError: On malformed values
+    """
+    method = params.get("method", "historical")
+    if method == "historical":
+        return None
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"method must be historical or one of {', '.join(MONTE_CARLO_METHODS)}")
+
+    options = {
+        "method": method,
+        "scenarios": int(params.get("scenarios", DEFAULT_SCENARIOS)),
+        "alpha": float(params.get("alpha", 0.05)),
+        "seed": int(params["seed"]) if params.get("seed") else None,
+        "horizon": int(params.get("horizon", 1)),
+        "block": int(params.get("block", DEFAULT_BLOCK)),
+    }
+    if not 0 < options["alpha"] < 1:
+        raise ValueError("alpha must be in (0, 1)")
+    if not 1 / options["alpha"] <= options["scenarios"] <= MAX_SCENARIOS:
+        raise ValueError(f"scenarios must be between 1/alpha and {MAX_SCENARIOS}")
+    if not 1 <= options["horizon"] <= MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HORIZON}")
+    if options["block"] < 1:
+        raise ValueError("block must be at least 1")
+    if options["seed"] is not None and options["seed"] < 0:
+        raise ValueError("seed must be non-negative")
+    return options
+
+
+class TailAccumulator:
+    """
+    Streaming reduction of a return stream: the exact ``k`` worst values (kept
+    with np.partition, so memory stays O(k + chunk)) plus a running mean and
+    variance merged chunk by chunk.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.tail = np.empty(0)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        merged = np.concatenate((self.tail, values))
+        if len(merged) > self.k:
+            merged = np.partition(merged, self.k - 1)[:self.k]
+        self.tail = merged
+
+        # Chan et al. parallel variance update
+        n, mean = len(values), values.mean()
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += ((values - mean) ** 2).sum() + delta ** 2 * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    def var_cvar(self, alpha):
+        """VaR/CVaR of everything seen, with the rp.VaR_Hist/rp.CVaR_Hist definitions."""
+        q = self.tail.max()
+        return -q, -q - (self.tail - q).sum() / (alpha * self.count)
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+def _parametric_chunks(rng, X, w, scenarios, chunk, horizon):
+    """
+    Portfolio returns under multivariate normal asset returns with the sample
+    mean and covariance of ``X``, scaled to ``horizon`` days. With fixed
+    weights the portfolio return is itself normal, N(w'mu, w'Sigma w), so one
+    standard normal is drawn per scenario instead of one per asset.
+    """
+    mean = horizon * float(X.mean().to_numpy() @ w)
+    scale = math.sqrt(horizon * max(float(w @ X.cov().to_numpy() @ w), 0.0))
+    for start in range(0, scenarios, chunk):
+        yield mean + scale * rng.standard_normal(min(chunk, scenarios - start))
+
+
+def _bootstrap_days(horizon, block):
+    # Days drawn per scenario before trimming to the horizon. Days of a block
+    # past the horizon are never used, so a longer block draws no more.
+    block = min(block, horizon)
+    return -(-horizon // block) * block
+
+
+def _bootstrap_chunks(rng, X, w, scenarios, chunk, horizon, block):
+    """
+    Circular block bootstrap of the historical returns: each scenario strings
+    together blocks of ``block`` consecutive days (keeping short-range
+    dependence) until it spans ``horizon`` days. Weights are fixed, so days are
+    resampled on the portfolio series R @ w. ``chunk`` bounds the scenarios
+    per chunk; each takes _bootstrap_days(horizon, block) indices.
+    """
+    portfolio_returns = X.to_numpy(dtype=np.float64) @ w
+    T = len(portfolio_returns)
+    block = min(block, horizon)
+    blocks = -(-horizon // block)
+    offsets = np.arange(block)
+    for start in range(0, scenarios, chunk):
+        size = min(chunk, scenarios - start)
+        starts = rng.integers(0, T, (size, blocks))
+        days = starts[:, :, None] + offsets
+        np.remainder(days, T, out=days)
+        days = days.reshape(size, -1)[:, :horizon]
+        yield portfolio_returns[days].sum(axis=1)
+
+
+def simulated_draws(options):
+    """Random draws a simulation takes, the measure of its cost, for options of parse_monte_carlo_options."""
+    if options["method"] == "bootstrap":
+        return options["scenarios"] * _bootstrap_days(options["horizon"], options["block"])
+    return options["scenarios"]
+
+
+def monte_carlo_risk(X, weights, method, scenarios=DEFAULT_SCENARIOS, alpha=0.05, seed=None,
+                     horizon=1, block=DEFAULT_BLOCK):
+    """
+    Simulated VaR/CVaR of a portfolio.
+    Scenarios are generated in chunks of at most CHUNK_ELEMENTS draws from a
+    seeded NumPy Generator and reduced as they stream, so a million scenarios
+    of a long horizon never sit in memory at once.
+    :param X: DataFrame of historical returns
+    :param weights: Dictionary of symbol -> weight for the columns of ``X``
+    :param method: "parametric" (multivariate normal) or "bootstrap" (block bootstrap)
+    :param horizon: Days per scenario, at most MAX_HORIZON
+    :param block: Block length of the bootstrap, at most the days in ``X``
+    :param seed: Generator seed; a fresh one is drawn (and returned) when omitted
+    :return: Dictionary with Std_Dev, VaR_xx and CVaR_xx of the horizon return
+        plus the simulation settings needed to reproduce it
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    rng = np.random.default_rng(seed)
+    w = np.array([weights[symbol] for symbol in X.columns], dtype=np.float64)
+
+    if method == "parametric":
+        chunks = _parametric_chunks(rng, X, w, scenarios, CHUNK_ELEMENTS, horizon)
+    else:
+        if block > len(X):
+            raise ValueError(f"block must be at most the {len(X)} days of returns")
+        chunk = max(1, CHUNK_ELEMENTS // _bootstrap_days(horizon, block))
+        chunks = _bootstrap_chunks(rng, X, w, scenarios, chunk, horizon, block)
+
+    accumulator = TailAccumulator(math.ceil(alpha * scenarios))
+    with timed(f"monte_carlo_{method}"):
+        for values in chunks:
+            accumulator.update(values)
+
+    var, cvar = accumulator.var_cvar(alpha)
+    label = confidence_label(alpha)
+    return {
+        "Std_Dev": accumulator.std(),
+        f"VaR_{label}": float(var),
+        f"CVaR_{label}": float(cvar),
+        "method": method,
+        "scenarios": scenarios,
+        "horizon": horizon,
+        **({"block": block} if method == "bootstrap" else {}),
+        "seed": seed,
+    }
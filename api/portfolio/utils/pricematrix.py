@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from api.portfolio.models import PriceMatrix
+from api.services.instrumentation import count, timed
+from api.services.models import HistoricalStockData
+
+
+def _to_frame(matrix):
+    dates = np.frombuffer(matrix.dates, dtype="datetime64[D]")
+    prices = np.frombuffer(matrix.prices, dtype=np.float64).reshape(len(dates), len(matrix.columns))
+    return pd.DataFrame(
+        prices,
+        index=pd.DatetimeIndex(dates, name="date"),
+        columns=pd.Index(matrix.columns, name="symbol"))
+
+
+def build_price_matrix(symbols):
+    """
+    Pivot the stored history of ``symbols`` into a date x symbol DataFrame.
+    Dates missing for a symbol are NaN.
+    """
+    # No ORDER BY: the pivot sorts, so the read stays a covering index scan
+    rows = HistoricalStockData.objects.filter(symbol__in=symbols).order_by().values_list(
+        "date", "symbol", "adjusted_close")
+    df = pd.DataFrame.from_records(rows, columns=["date", "symbol", "adjusted_close"])
+    if df.empty:
+        return pd.DataFrame(
+            index=pd.DatetimeIndex([], name="date"), columns=pd.Index([], name="symbol"), dtype=np.float64)
+
+    with timed("pivot"):
+        df["date"] = pd.to_datetime(df["date"])
+        return df.pivot(index="date", columns="symbol", values="adjusted_close").sort_index()
+
+
+def load_price_matrix(portfolio, symbols):
+    """
+    Return the price matrix of ``portfolio`` for its held ``symbols``.
+    The stored matrix is reused while the holdings match; otherwise it is
+    rebuilt and stored. History writes drop affected matrices (see
+    invalidate_price_matrices).
+    """
+    symbols = sorted(set(symbols))
+    matrix = PriceMatrix.objects.filter(portfolio=portfolio).first()
+    if matrix is not None and matrix.symbols == symbols:
+        count("price_matrix_hits")
+        return _to_frame(matrix)
+
+    count("price_matrix_rebuilds")
+    pivot = build_price_matrix(symbols)
+    PriceMatrix.objects.update_or_create(
+        portfolio=portfolio,
+        defaults={
+            "symbols": symbols,
+            "columns": pivot.columns.tolist(),
+            "dates": pivot.index.values.astype("datetime64[D]").tobytes(),
+            "prices": np.ascontiguousarray(pivot.to_numpy(dtype=np.float64)).tobytes(),
+        })
+    return pivot
+
+
+def invalidate_price_matrices(symbol):
+    """Drop the stored matrices of every portfolio holding ``symbol``."""
+    PriceMatrix.objects.filter(portfolio__stocks__symbol=symbol).delete()
@@ -1,87 +1,294 @@
-import pandas as pd
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
 import numpy as np
 import riskfolio as rp
+from django.conf import settings
+from django.core.cache import cache
+
+from api.portfolio.utils.solvers import SOLVES, build_portfolio, solve, solve_shared, warm_up, weights_to_json
+from api.services.instrumentation import count, timed
+from api.services.metrics import SOLVE_DURATION, SOLVE_TIMEOUTS
+
+ANALYSIS_CACHE_TIMEOUT = 24 * 3600
+ANALYSIS_PARAMS = {
+    "method_mu": "hist",  # Historical expected returns
+    "method_cov": "hist",  # Historical covariance matrix
+    "model": "Classic",
+    "rf": 0,  # Risk-free rate
+    "hist": True,
+}
+
+SOLVE_POLL_INTERVAL = 0.05  # seconds between checks of the running solves' budgets
+
+logger = logging.getLogger(__name__)
+
+
+def returns_fingerprint(X, **params):
+    """
+    Content hash of a returns matrix plus the parameters applied to it.
+    Identical data and parameters always give the same key.
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X.to_numpy(dtype=np.float64)).tobytes())
+    digest.update(json.dumps(
+        [[str(c) for c in X.columns], [str(X.index[0]), str(X.index[-1])] if len(X) else [], params],
+        sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
 
 def perform_risk_analysis(X):
     """
     Perform risk analysis and optimization on the portfolio.
+    Results are deterministic for a given returns matrix, so they are cached
+    under its content hash. With RISK_ANALYSIS_PARALLEL the three solves run
+    concurrently in a process pool, each limited to RISK_ANALYSIS_SOLVE_TIMEOUT
+    seconds once started and as long again while queued; solves over budget
+    are listed under "timed_out" and such partial results are not cached.
     :param X: DataFrame of historical returns
     :return: Dictionary containing optimized weights for different models
     """
     if X.empty:
         return None  # Not enough data for risk analysis
 
-    # Create Portfolio object
-    port = rp.Portfolio(returns=X)
-
-    # Set estimation methods
-    method_mu = 'hist'  # Historical expected returns
-    method_cov = 'hist'  # Historical covariance matrix
-    port.assets_stats(method_mu=method_mu, method_cov=method_cov)
-
-    # Portfolio Optimization Parameters
-    model = 'Classic'
-    rf = 0  # Risk-free rate
-    hist = True
-
-    # --- 1. Mean-Variance Optimization (MV) ---
-    w_mv = port.optimization(
-        model=model,
-        rm='MV',
-        obj='Sharpe',
-        rf=rf,
-        hist=hist)
-
-    # --- 2. Conditional Value at Risk (CVaR) Optimization ---
-    w_cvar = port.optimization(
-        model=model,
-        rm='CVaR',
-        obj='Sharpe',
-        rf=rf,
-        hist=hist)
-
-    # --- 3. Equal Risk Contribution (ERC) Portfolio ---
-    w_erc = port.rp_optimization(model=model, rm='MV', rf=rf, hist=hist)
-
-    if w_mv.empty or w_cvar.empty or w_erc.empty:
+    cache_key = f"risk_analysis:{returns_fingerprint(X, **ANALYSIS_PARAMS)}"
+    if (cached := cache.get(cache_key)) is not None:
+        count("analysis_cache_hits")
+        return cached
+
+    count("analysis_cache_misses")
+    if getattr(settings, "RISK_ANALYSIS_PARALLEL", False):
+        result = _optimize_in_pool(X, settings.RISK_ANALYSIS_SOLVE_TIMEOUT, **ANALYSIS_PARAMS)
+    else:
+        result = _optimize_portfolio(X, **ANALYSIS_PARAMS)
+    if result is not None and "timed_out" not in result:
+        cache.set(cache_key, result, timeout=ANALYSIS_CACHE_TIMEOUT)
+    return result
+
+
+def _optimize_portfolio(X, method_mu, method_cov, model, rf, hist):
+    with timed("assets_stats"):
+        port = build_portfolio(X, method_mu, method_cov)
+
+    weights = {}
+    for name, label in SOLVES.items():
+        with timed(f"opt_{label.lower()}"), SOLVE_DURATION.time(model=label):
+            weights[name] = solve(port, name, model, rf, hist)
+
+    if any(w is None for w in weights.values()):
         return None  # Optimization failed
 
-    return {
-        # "mean_variance": w_mv.squeeze().to_dict(),
-        # "cvar": w_cvar.squeeze().to_dict(),
-        # "erc": w_erc.squeeze().to_dict()
-        "mean_variance": (
-            w_mv.squeeze().to_dict() if isinstance(
-                w_mv.squeeze(), pd.Series) else w_mv.squeeze().item()
-        ),
-        "cvar": (
-            w_cvar.squeeze().to_dict() if isinstance(
-                w_cvar.squeeze(), pd.Series) else w_cvar.squeeze().item()
-        ),
-        "erc": (
-            w_erc.squeeze().to_dict() if isinstance(
-                w_erc.squeeze(), pd.Series) else w_erc.squeeze().item()
-        )
+    return {name: weights_to_json(w) for name, w in weights.items()}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _solver_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = getattr(settings, "RISK_ANALYSIS_WORKERS", len(SOLVES))
+            # spawn: forking a threaded server process is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=warm_up)
+            # Start the workers now so their imports don't count against solve budgets
+            wait([_pool.submit(warm_up) for _ in range(workers)])
+        return _pool
+
+
+def _discard_pool(pool):
+    """Forget a broken pool; the next call starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _wait_for_solves(futures, start_times, time_limit, submitted):
+    """
+    Wait for each solve until it is done or ``time_limit`` seconds have passed
+    since its worker picked it up. A solve still queued behind other requests'
+    solves is given up once it has waited one budget, so the request as a
+    whole never waits longer than twice ``time_limit``.
+    :param futures: Dictionary of future -> timestamp slot
+    :param start_times: Callable returning the start timestamps (0 until started)
+    :param submitted: time.time() when the solves were submitted
+    :return: Futures left behind over budget
+    """
+    pending, overdue = set(futures), set()
+    while pending:
+        _, pending = wait(pending, timeout=SOLVE_POLL_INTERVAL)
+        started, now = start_times(), time.time()
+        late = {
+            future for future in pending
+            if (started[futures[future]] or submitted + time_limit) < now - time_limit
+        }
+        for future in late:
+            future.cancel()  # Drops it from the queue if no worker took it yet
+        overdue |= late
+        pending -= late
+    return overdue
 
-    }
 
-def calculate_risk_measures(returns, stock_symbols):
+def _optimize_in_pool(X, time_limit, method_mu, method_cov, model, rf, hist):
+    values = np.ascontiguousarray(X.to_numpy(dtype=np.float64))
+    names = list(SOLVES)
+    # The returns matrix, then one start timestamp per solve, set by its worker
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes + len(names) * 8)
+    try:
+        shared = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = values
+        shared = np.ndarray(len(names), dtype=np.float64, buffer=shm.buf, offset=values.nbytes)
+        shared[:] = 0
+        del shared
+
+        try:
+            pool = _solver_pool()
+            submitted = time.time()
+            futures = {
+                pool.submit(
+                    solve_shared, name, slot, shm.name, values.shape, X.columns.tolist(), time_limit,
+                    method_mu=method_mu, method_cov=method_cov, model=model, rf=rf, hist=hist): slot
+                for slot, name in enumerate(names)
+            }
+        except BrokenProcessPool:
+            logger.warning("Solver pool unavailable, solving in process", exc_info=True)
+            if _pool is not None:
+                _discard_pool(_pool)
+            return _optimize_portfolio(X, method_mu, method_cov, model, rf, hist)
+
+        def start_times():
+            return np.frombuffer(shm.buf, dtype=np.float64, count=len(names), offset=values.nbytes).copy()
+
+        with timed("solve_pool"):
+            overdue = _wait_for_solves(futures, start_times, time_limit, submitted)
+    finally:
+        shm.close()
+        shm.unlink()  # Workers still solving keep their own mapping
+
+    result, timed_out = {}, []
+    for future, slot in futures.items():
+        name = names[slot]
+        label = SOLVES[name]
+        try:
+            if future in overdue:
+                # Only this request's solve is left behind; the solver's own
+                # time limit frees the worker, and the pool stays up for others
+                # (a queued one was cancelled)
+                raise TimeoutError
+            weights, seconds = future.result()
+        except (TimeoutError, BrokenProcessPool) as e:
+            if isinstance(e, BrokenProcessPool):
+                logger.warning("Solver pool broke during %s", name, exc_info=True)
+                _discard_pool(pool)
+            count("solve_timeouts")
+            SOLVE_TIMEOUTS.inc(model=label)
+            timed_out.append(name)
+            continue
+
+        SOLVE_DURATION.observe(seconds, model=label)
+        if weights is None:
+            return None  # Optimization failed
+        result[name] = weights
+
+    if timed_out:
+        result["timed_out"] = timed_out
+    return result
+
+
+def confidence_label(alpha):
+    return f"{(1 - alpha) * 100:g}"  # 0.05 -> "95"
+
+
+def calculate_risk_measures(returns, stock_symbols, alphas=(0.05,)):
+    """
+    Per-symbol risk measures, computed for all symbols at once on a 2-D array.
+    :param returns: DataFrame of historical returns
+    :param stock_symbols: Columns of ``returns`` to evaluate
+    :param alphas: Tail probabilities for historical VaR/CVaR (0.05 -> VaR_95)
+    :return: Dictionary of symbol -> {MAD, Volatility, VaR_xx, CVaR_xx, Max_Drawdown}
+    """
+    if not stock_symbols:
+        return {}
+
+    with timed("risk_measures"):
+        return _risk_measures(returns, stock_symbols, alphas)
+
+
+def _risk_measures(returns, stock_symbols, alphas):
+    # Column-major so every per-symbol reduction runs over contiguous memory
+    a = np.asfortranarray(returns[stock_symbols].to_numpy(dtype=np.float64))
+
+    mad = np.mean(np.abs(a - np.mean(a, axis=0)), axis=0)
+    volatility = np.std(a, axis=0)
+    var = np.percentile(a, [alpha * 100 for alpha in alphas], axis=0)
+    tails = [a <= v for v in var]
+    cvar = [np.where(tail, a, 0).sum(axis=0) / tail.sum(axis=0) for tail in tails]
+    cumulative = np.cumsum(a, axis=0)
+    max_drawdown = (np.maximum.accumulate(cumulative, axis=0) - cumulative).max(axis=0)
+
     risk_measures = {}
-    for symbol in stock_symbols:
-        stock_returns = returns[symbol]
-        var_95 = np.percentile(stock_returns, 5)
-        cvar_95 = stock_returns[stock_returns <= var_95].mean()
-
-        risk_measures[symbol] = {
-            "MAD": rp.MAD(stock_returns),
-            "Volatility": np.std(stock_returns),
-            "VaR_95": -var_95,  # Make it positive
-            "CVaR_95": -cvar_95,  # Make it positive
-            "Max_Drawdown": (stock_returns.cumsum().cummax() - stock_returns.cumsum()).max()
+    for j, symbol in enumerate(stock_symbols):
+        measures = {
+            "MAD": float(mad[j]),
+            "Volatility": float(volatility[j]),
         }
+        for k, alpha in enumerate(alphas):
+            label = confidence_label(alpha)
+            measures[f"VaR_{label}"] = float(-var[k][j])  # Make it positive
+            measures[f"CVaR_{label}"] = float(-cvar[k][j])  # Make it positive
+        measures["Max_Drawdown"] = float(max_drawdown[j])
+        risk_measures[symbol] = measures
     return risk_measures
 
 
+def historical_var_cvar(returns, alpha=0.05):
+    """
+    Historical VaR and CVaR of every column of a T x K returns array, with the
+    same definitions as rp.VaR_Hist/rp.CVaR_Hist. np.partition finds the k
+    worst returns of all columns in O(T) instead of sorting each one.
+    :return: (VaR, CVaR) arrays of length K, as positive losses
+    """
+    a = np.asarray(returns, dtype=np.float64)
+    k = math.ceil(alpha * len(a))
+    worst = np.partition(a, k - 1, axis=0)[:k]
+    q = worst[k - 1]
+    var = -q
+    cvar = -q - (worst - q).sum(axis=0) / (alpha * len(a))
+    return var, cvar
+
+
+def calculate_candidate_risk(X, weights, alpha=0.05):
+    """
+    Batched calculate_portfolio_risk for many weight vectors over the same
+    returns: the covariance is computed once, volatilities come from one
+    batched quadratic form and VaR/CVaR from one R @ W product.
+    :param X: DataFrame of historical returns
+    :param weights: K x N array, one candidate per row, columns in X.columns order
+    :param alpha: Significance level of VaR/CVaR
+    :return: Dictionary of arrays of length K: Std_Dev, VaR_xx and CVaR_xx
+    """
+    R = X.to_numpy(dtype=np.float64)
+    W = np.asarray(weights, dtype=np.float64).T
+    cov = np.atleast_2d(np.cov(R, rowvar=False))  # ddof=1, like X.cov()
+    std_dev = np.sqrt(np.maximum(np.einsum("ik,ik->k", W, cov @ W), 0))
+    var, cvar = historical_var_cvar(R @ W, alpha)
+
+    label = confidence_label(alpha)
+    return {"Std_Dev": std_dev, f"VaR_{label}": var, f"CVaR_{label}": cvar}
+
+
 def calculate_portfolio_risk(X, weights):
     """
     Computes portfolio-level risk measures using Riskfolio-Lib.
@@ -0,0 +1,102 @@
+import math
+
+import numpy as np
+
+
+class _FenwickTree:
+    """Binary indexed tree over positions 0..n-1 (prefix sums and k-th lookup)."""
+
+    def __init__(self, n):
+        self.n = n
+        self.tree = [0.0] * (n + 1)
+        self.top = 1 << (n.bit_length() - 1) if n else 0
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Sum over positions 0..i."""
+        i += 1
+        total = 0.0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find_kth(self, k):
+        """Smallest position whose prefix sum reaches ``k`` (counts tree only)."""
+        pos = 0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+
+def rolling_risk(returns, window, alpha=0.05):
+    """
+    Rolling volatility and historical VaR/CVaR of a return series.
+    Every step is incremental: volatility from running sums, and VaR/CVaR from
+    two Fenwick trees over the global rank of each observation (one counting
+    members of the window, one summing their returns), so a step costs
+    O(log n) instead of re-sorting the window. VaR/CVaR follow the same
+    definitions as rp.VaR_Hist/rp.CVaR_Hist.
+    :param returns: 1-D array of returns
+    :param window: Number of observations per window
+    :param alpha: Significance level of VaR/CVaR
+    :return: Dictionary of arrays aligned to ``returns[window - 1:]``
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    n = len(x)
+    if n < window or window < 2:
+        empty = np.empty(0)
+        return {"volatility": empty, "VaR": empty, "CVaR": empty}
+
+    # Running sums (centered to limit cancellation); sample std like X.cov()
+    centered = x - x.mean()
+    s1 = np.concatenate(([0.0], np.cumsum(centered)))
+    s2 = np.concatenate(([0.0], np.cumsum(centered ** 2)))
+    sum1 = s1[window:] - s1[:-window]
+    sum2 = s2[window:] - s2[:-window]
+    volatility = np.sqrt(np.maximum(sum2 - sum1 ** 2 / window, 0) / (window - 1))
+
+    order = np.argsort(x, kind="stable")
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    sorted_x = x[order].tolist()
+    rank = rank.tolist()
+    values = x.tolist()
+
+    k = math.ceil(alpha * window)
+    counts = _FenwickTree(n)
+    sums = _FenwickTree(n)
+    var = np.empty(n - window + 1)
+    cvar = np.empty(n - window + 1)
+
+    for t in range(n):
+        counts.add(rank[t], 1)
+        sums.add(rank[t], values[t])
+        if t >= window:
+            counts.add(rank[t - window], -1)
+            sums.add(rank[t - window], -values[t - window])
+        if t >= window - 1:
+            position = counts.find_kth(k)
+            q = sorted_x[position]
+            tail_sum = sums.prefix(position)
+            var[t - window + 1] = -q
+            cvar[t - window + 1] = -q - (tail_sum - k * q) / (alpha * window)
+
+    return {"volatility": volatility, "VaR": var, "CVaR": cvar}
+
+
+def downsample_indices(n, max_points):
+    """Evenly spaced indices (first and last included) for at most ``max_points`` points."""
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(np.int64))
@@ -0,0 +1,87 @@
+import math
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import riskfolio as rp
+
+# Analysis result key -> risk model label
+SOLVES = {
+    "mean_variance": "MV",
+    "cvar": "CVaR",
+    "erc": "ERC",
+}
+
+# cvxpy keyword for a wall-clock limit, per solver riskfolio may try
+TIME_LIMIT_PARAMS = {
+    "CLARABEL": "time_limit",
+    "SCS": "time_limit_secs",
+    "OSQP": "time_limit",
+}
+
+
+def build_portfolio(X, method_mu, method_cov, time_limit=None):
+    """
+    rp.Portfolio with estimated statistics, optionally asking each solver to
+    stop after ``time_limit`` seconds. With a limit, solvers that cannot take
+    one (ECOS, CVXOPT) are dropped, so no solve can hold a pool worker
+    unbounded; riskfolio tries the rest in turn, each with the full limit.
+    """
+    port = rp.Portfolio(returns=X)
+    port.assets_stats(method_mu=method_mu, method_cov=method_cov)
+    if time_limit:
+        port.solvers = [solver for solver in port.solvers if solver in TIME_LIMIT_PARAMS]
+        port.sol_params = {solver: {TIME_LIMIT_PARAMS[solver]: time_limit} for solver in port.solvers}
+    return port
+
+
+def solve(port, name, model, rf, hist):
+    """
+    Run one of the SOLVES on ``port``.
+    :return: Weights DataFrame, or None when the optimization failed
+    """
+    if name == "erc":
+        # Equal Risk Contribution (ERC) Portfolio
+        w = port.rp_optimization(model=model, rm='MV', rf=rf, hist=hist)
+    else:
+        # Max Sharpe under Mean-Variance (MV) or Conditional Value at Risk (CVaR)
+        w = port.optimization(model=model, rm=SOLVES[name], obj='Sharpe', rf=rf, hist=hist)
+    return None if w is None or w.empty else w
+
+
+def weights_to_json(w):
+    w = w.squeeze()
+    return w.to_dict() if isinstance(w, pd.Series) else w.item()
+
+
+def warm_up():
+    """Pool initializer; the imports above are the slow part of a worker's start."""
+
+
+def solve_shared(name, slot, shm_name, shape, columns, time_limit, method_mu, method_cov, model, rf, hist):
+    """
+    Process-pool entry point: solve ``name`` on a returns matrix the parent
+    placed in shared memory, so it is never pickled to the workers. The start
+    time goes into timestamp ``slot`` after the matrix; the parent charges the
+    solve's budget from there, not from when it was queued.
+    :return: (JSON-ready weights or None, solve seconds)
+    """
+    # Spawned workers share the parent's resource tracker, and the parent unlinks the block
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        start_time = np.ndarray(1, dtype=np.float64, buffer=shm.buf, offset=(math.prod(shape) + slot) * 8)
+        start_time[0] = time.time()
+        del start_time
+        X = pd.DataFrame(np.ndarray(shape, dtype=np.float64, buffer=shm.buf), columns=columns, copy=False)
+        started = time.perf_counter()
+        port = build_portfolio(X, method_mu, method_cov, time_limit)
+        w = solve(port, name, model, rf, hist)
+        seconds = time.perf_counter() - started
+        del X, port
+        return (None if w is None else weights_to_json(w)), seconds
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # A view is still referenced; the mapping goes with the worker
@@ -0,0 +1,95 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+RESAMPLE_FREQUENCIES = {"W": "W", "M": "ME"}  # Query value -> pandas offset alias
+
+
+def parse_series_options(params):
+    """
+    Read chart shaping options from query parameters.
+    :param params: Mapping with optional start, end (YYYY-MM-DD), freq (W/M) and max_points
+    :return: JSON-serializable dictionary of the options that were given
+    :raises ValueError: On malformed values
+    """
+    options = {}
+    for name in ("start", "end"):
+        if params.get(name):
+            options[name] = date.fromisoformat(params[name]).isoformat()
+    if params.get("freq"):
+        if params["freq"] not in RESAMPLE_FREQUENCIES:
+            raise ValueError(f"freq must be one of {', '.join(RESAMPLE_FREQUENCIES)}")
+        options["freq"] = params["freq"]
+    if params.get("max_points"):
+        options["max_points"] = int(params["max_points"])
+        if options["max_points"] < 3:
+            raise ValueError("max_points must be at least 3")
+    return options
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets decimation.
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and troughs.
+    :return: Sorted indices of the points to keep
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean() if end < next_end else x[n - 1]
+        avg_y = y[end:next_end].mean() if end < next_end else y[n - 1]
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    indices[-1] = n - 1
+    return indices
+
+
+def _decimate(series, threshold):
+    x = series.index.values.astype("datetime64[D]").astype(np.int64)
+    return series.iloc[lttb_indices(x, series.to_numpy(), threshold)]
+
+
+def shape_series(series, options, keep=None):
+    """
+    Apply date range, resampling and LTTB decimation to a date-indexed Series.
+    :param keep: Dates LTTB kept from a series charted together with this one.
+        Between its first and last date they replace LTTB, so the two stay
+        aligned; history outside that window is decimated on its own, to a
+        share of max_points in proportion to its length
+    """
+    if not options:
+        return series
+
+    series = series.loc[options.get("start"):options.get("end")]
+    if "freq" in options:
+        series = series.resample(RESAMPLE_FREQUENCIES[options["freq"]]).last().dropna()
+    if "max_points" in options:
+        if keep is not None and len(keep) and len(series):
+            before, after = series.index < keep[0], series.index > keep[-1]
+            parts = [series[before], series[~before & ~after & series.index.isin(keep)], series[after]]
+            for i in (0, 2):
+                parts[i] = _decimate(parts[i], max(3, options["max_points"] * len(parts[i]) // len(series)))
+            series = pd.concat(parts)
+        else:
+            series = _decimate(series, options["max_points"])
+    return series
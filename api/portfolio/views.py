@@ -1,4 +1,10 @@
+import csv
+import json
+from datetime import date
+
+import numpy as np
 import pandas as pd
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.authentication import TokenAuthentication
@@ -7,13 +13,37 @@ from rest_framework.response import Response
 
 from api.fund_manager.models import FundManager
 from api.portfolio.models import Portfolio
-from api.portfolio.serializers import PortfolioSerializer
+from api.portfolio.serializers import PortfolioSerializer, WhatIfSerializer
 
+from rest_framework.reverse import reverse
 from rest_framework.views import APIView
-from django.utils.timezone import now
 
-from api.portfolio.utils.riskanalysis import perform_risk_analysis, calculate_risk_measures, calculate_portfolio_risk
-from api.services.models import HistoricalStockData
+from api.jobs.models import Job
+from api.portfolio.tasks import (
+    ANALYZE_PORTFOLIO,
+    MONTE_CARLO_RISK,
+    enqueue_monte_carlo_risk,
+    enqueue_portfolio_analysis,
+)
+from api.portfolio.utils.analysis import analyze_portfolio
+from api.portfolio.utils.frontier import (
+    DEFAULT_FRONTIER_POINTS,
+    FRONTIER_RISK_MEASURES,
+    MAX_FRONTIER_POINTS,
+    efficient_frontier,
+)
+from api.portfolio.utils.montecarlo import (
+    SYNC_MAX_DRAWS,
+    monte_carlo_risk,
+    parse_monte_carlo_options,
+    simulated_draws,
+)
+from api.portfolio.utils.pricematrix import load_price_matrix
+from api.portfolio.utils.riskanalysis import calculate_candidate_risk, calculate_portfolio_risk
+from api.portfolio.utils.rolling import downsample_indices, rolling_risk
+from api.portfolio.utils.timeseries import parse_series_options
+from api.renderers import SERIES_RENDERER_CLASSES, CSVStreamRenderer, NDJSONStreamRenderer
+from api.services.history import iter_history_rows
 
 
 class PortfolioViewSet(viewsets.ModelViewSet):
@@ -38,140 +68,93 @@ class PortfolioViewSet(viewsets.ModelViewSet):
 
 class AnalyzePortfolioAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = SERIES_RENDERER_CLASSES
 
     def get(self, request, portfolio_id):
         portfolio = get_object_or_404(
             Portfolio, id=portfolio_id, fund_manager__user=request.user
         )
-        stocks = portfolio.stocks.all()
 
-        stock_data = []
-        total_value = 0
-        stock_symbols = []
-
-        for stock in stocks:
-            manual_price = stock.price
-            try:
-                live_price = stock.get_live_price()
-            except Exception as e:
-                print(f"⚠️ Error fetching live price for {stock.symbol}: {e}")
-                live_price = None
-
-            price = manual_price or live_price
-            if price is not None:
-                stock_total = price * stock.quantity
-                total_value += stock_total
-                stock_symbols.append(stock.symbol)
-
-                stock_data.append({
-                    'name': stock.name,
-                    'symbol': stock.symbol,
-                    'quantity': stock.quantity,
-                    'manual_price': float(manual_price) if manual_price else None,
-                    'live_price': float(live_price) if live_price else None,
-                    'total_value': float(stock_total),
-                })
-
-        historical_qs = HistoricalStockData.objects.filter(
-            portfolio=portfolio).order_by("date")
-
-        if not historical_qs.exists():
-            return Response({
-                "message": "No historical data available for this portfolio.",
-                "stock_data": stock_data,
-                "total_value": float(total_value),
-                "historical_data": {},
-                "risk_measures": {},
-                "portfolio_analysis": {},
-                "portfolio_value": [],
-                "timestamp": int(now().timestamp())
-            }, status=status.HTTP_200_OK)
-
-        df = pd.DataFrame.from_records(historical_qs.values("date", "symbol", "adjusted_close"))
-        if df.empty:
-            return Response({"message": "Historical data exists but is empty."}, status=200)
-
-        pivot_df = df.pivot(index='date', columns='symbol', values='adjusted_close').dropna()
-        available_symbols = pivot_df.columns.tolist()
-        filtered_symbols = [s for s in stock_symbols if s in available_symbols]
-
-        if not filtered_symbols:
-            return Response({"message": "None of the stocks have valid historical data."}, status=200)
-
-        historical_data = {
-            symbol: {
-                "dates": df[df["symbol"] == symbol]["date"].astype(str).tolist(),
-                "prices": df[df["symbol"] == symbol]["adjusted_close"].tolist()
-            } for symbol in filtered_symbols
-        }
+        try:
+            series_options = parse_series_options(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        X = pivot_df[filtered_symbols].pct_change().dropna()
-        if X.empty:
-            return Response({"message": "Not enough historical data to compute returns."}, status=200)
+        if request.query_params.get("async", "").lower() in ("1", "true"):
+            job = enqueue_portfolio_analysis(portfolio, series_options)
+            return Response({
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": reverse(
+                    "analyze-portfolio-job",
+                    kwargs={"portfolio_id": portfolio.id, "job_id": job.id},
+                    request=request),
+            }, status=status.HTTP_202_ACCEPTED)
 
-        portfolio_analysis = perform_risk_analysis(X)
-        risk_measures = calculate_risk_measures(X, filtered_symbols)
+        return Response(analyze_portfolio(portfolio, series_options), status=status.HTTP_200_OK)
 
-        if not portfolio_analysis:
-            return Response({"message": "Portfolio optimization failed due to insufficient data."}, status=200)
 
-        portfolio_values = (pivot_df[filtered_symbols] * pd.Series({
-            stock.symbol: stock.quantity for stock in stocks if stock.symbol in filtered_symbols
-        })).sum(axis=1)
+class AnalysisJobAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = SERIES_RENDERER_CLASSES
+    job_kind = ANALYZE_PORTFOLIO
 
-        portfolio_value_json = portfolio_values.reset_index()
-        portfolio_value_json["date"] = portfolio_value_json["date"].astype(str)
-        portfolio_value_json.columns = ["x", "y"]
-        portfolio_value_json = portfolio_value_json.to_dict(orient="records")
+    def get(self, request, portfolio_id, job_id):
+        portfolio = get_object_or_404(
+            Portfolio, id=portfolio_id, fund_manager__user=request.user
+        )
+        job = get_object_or_404(Job, id=job_id, kind=self.job_kind)
+        if job.payload.get("portfolio_id") != portfolio.id:
+            raise Http404
 
         return Response({
-            "portfolio": {
-                "id": portfolio.id,
-                "name": portfolio.name,
-            },
-            "stock_data": stock_data,
-            "total_value": float(total_value),
-            "historical_data": historical_data,
-            "portfolio_analysis": {
-                "mean_variance": portfolio_analysis.get("mean_variance", {}),
-                "cvar": portfolio_analysis.get("cvar", {}),
-                "erc": portfolio_analysis.get("erc", {}),
-            },
-            "risk_measures": risk_measures,
-            "portfolio_value": portfolio_value_json,
-            "timestamp": int(now().timestamp())
+            "job_id": job.id,
+            "status": job.status,
+            "result": job.result if job.status == Job.Status.DONE else None,
+            "error": job.last_error if job.status == Job.Status.FAILED else None,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
         }, status=status.HTTP_200_OK)
 
+
+class RiskJobAPIView(AnalysisJobAPIView):
+    job_kind = MONTE_CARLO_RISK
+
+
 class PortfolioRiskAPIView(APIView):
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = SERIES_RENDERER_CLASSES
 
     def get(self, request, portfolio_id):
+        """
+        Historical risk by default; ``?method=parametric|bootstrap`` switches
+        to Monte Carlo (see parse_monte_carlo_options for the other options).
+        Simulations over SYNC_MAX_DRAWS are queued instead: the response is
+        202 with a status_url to poll for the result.
+        """
         portfolio = get_object_or_404(
             Portfolio,
             id=portfolio_id,
             fund_manager__user=request.user
         )
 
+        try:
+            simulation = parse_monte_carlo_options(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         stocks = portfolio.stocks.all()
 
-        historical_prices_qs = HistoricalStockData.objects.filter(
-            portfolio=portfolio
-        ).order_by("date")
+        price_matrix = load_price_matrix(portfolio, [stock.symbol for stock in stocks])
 
-        if not historical_prices_qs.exists():
+        if price_matrix.empty:
             return Response(
                 {"detail": "No historical data available to calculate portfolio risk."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        df = pd.DataFrame.from_records(
-            historical_prices_qs.values("date", "symbol", "adjusted_close")
-        )
-
-        price_data = df.pivot(
-            index="date", columns="symbol", values="adjusted_close"
-        ).ffill()
+        price_data = price_matrix.ffill()
 
         available_symbols = price_data.columns.tolist()
         valid_stocks = [stock for stock in stocks if stock.symbol in available_symbols]
@@ -189,12 +172,32 @@ class PortfolioRiskAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if simulation and simulation["method"] == "bootstrap" and simulation["block"] > len(X):
+            return Response(
+                {"detail": f"block must be at most the {len(X)} days of returns."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if simulation and simulated_draws(simulation) > SYNC_MAX_DRAWS:
+            job = enqueue_monte_carlo_risk(portfolio, simulation)
+            return Response({
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": reverse(
+                    "portfolio-risk-job",
+                    kwargs={"portfolio_id": portfolio.id, "job_id": job.id},
+                    request=request),
+            }, status=status.HTTP_202_ACCEPTED)
+
         portfolio_weights = {
             stock.symbol: 1 / len(available_symbols) for stock in valid_stocks
         }
 
         try:
-            portfolio_risk_measures = calculate_portfolio_risk(X, portfolio_weights)
+            if simulation:
+                portfolio_risk_measures = monte_carlo_risk(X, portfolio_weights, **simulation)
+            else:
+                portfolio_risk_measures = calculate_portfolio_risk(X, portfolio_weights)
         except Exception as e:
             return Response(
                 {"detail": f"Risk calculation error: {str(e)}"},
@@ -216,4 +219,233 @@ class PortfolioRiskAPIView(APIView):
             "portfolio_id": portfolio.id,
             "risk_measures": portfolio_risk_measures,
             "portfolio_value": portfolio_value_json
-        })
\ No newline at end of file
+        })
+
+
+class PortfolioWhatIfRiskAPIView(APIView):
+    """
+    Score candidate rebalances of a portfolio in one batch.
+    POST {"candidates": [{symbol: weight, ...}, ...], "alpha": 0.05}; symbols
+    left out of a candidate get weight 0. Weights are used as given (not
+    normalized). "current" scores the holdings weighted by market value.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, portfolio_id):
+        portfolio = get_object_or_404(
+            Portfolio,
+            id=portfolio_id,
+            fund_manager__user=request.user
+        )
+
+        serializer = WhatIfSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        candidates = serializer.validated_data["candidates"]
+        alpha = serializer.validated_data["alpha"]
+
+        quantities = {}
+        for stock in portfolio.stocks.all():
+            quantities[stock.symbol] = quantities.get(stock.symbol, 0) + stock.quantity
+
+        price_data = load_price_matrix(portfolio, list(quantities)).ffill()
+        X = price_data.pct_change().dropna()
+        if X.empty:
+            return Response(
+                {"detail": "Not enough historical data to compute returns."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        symbols = X.columns.tolist()
+        unknown = sorted({symbol for weights in candidates for symbol in weights} - set(symbols))
+        if unknown:
+            return Response(
+                {"detail": f"No historical data in this portfolio for: {', '.join(unknown)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        weights = np.zeros((len(candidates) + 1, len(symbols)))
+        for i, candidate in enumerate(candidates):
+            weights[i] = [candidate.get(symbol, 0.0) for symbol in symbols]
+        market_values = price_data.iloc[-1].to_numpy() * np.array([quantities[symbol] for symbol in symbols])
+        if market_values.sum() > 0:
+            weights[-1] = market_values / market_values.sum()
+
+        measures = calculate_candidate_risk(X, weights, alpha)
+        scored = [
+            {name: float(column[i]) for name, column in measures.items()}
+            for i in range(len(weights))
+        ]
+
+        return Response({
+            "portfolio_id": portfolio.id,
+            "alpha": alpha,
+            "symbols": symbols,
+            "observations": len(X),
+            "current": scored[-1] if market_values.sum() > 0 else None,
+            "candidates": scored[:-1],
+        })
+
+
+class PortfolioFrontierAPIView(APIView):
+    """
+    Efficient frontier of a portfolio's holdings: ?rm=MV|CVaR&points=N.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, portfolio_id):
+        portfolio = get_object_or_404(
+            Portfolio,
+            id=portfolio_id,
+            fund_manager__user=request.user
+        )
+
+        rm = request.query_params.get("rm", "MV")
+        try:
+            points = int(request.query_params.get("points", DEFAULT_FRONTIER_POINTS))
+        except ValueError:
+            points = 0
+        if rm not in FRONTIER_RISK_MEASURES or not 2 <= points <= MAX_FRONTIER_POINTS:
+            return Response(
+                {"detail": f"rm must be one of {', '.join(FRONTIER_RISK_MEASURES)} "
+                           f"and points an integer in [2, {MAX_FRONTIER_POINTS}]."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        symbols = portfolio.stocks.values_list("symbol", flat=True)
+        X = load_price_matrix(portfolio, symbols).dropna().pct_change().dropna()
+        if X.shape[0] < 2 or X.shape[1] < 2:
+            return Response(
+                {"detail": "A frontier needs at least two stocks with overlapping historical data."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            frontier = efficient_frontier(X, rm, points)
+        except Exception as e:
+            return Response(
+                {"detail": f"Frontier calculation error: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({
+            "portfolio_id": portfolio.id,
+            "risk_measure": rm,
+            "symbols": X.columns.tolist(),
+            "points": frontier,
+        })
+
+
+class PortfolioRollingRiskAPIView(APIView):
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = SERIES_RENDERER_CLASSES
+
+    DEFAULT_WINDOWS = "21,63,252"
+    DEFAULT_MAX_POINTS = 500
+
+    def get(self, request, portfolio_id):
+        portfolio = get_object_or_404(
+            Portfolio,
+            id=portfolio_id,
+            fund_manager__user=request.user
+        )
+
+        try:
+            windows = sorted({int(w) for w in request.query_params.get("windows", self.DEFAULT_WINDOWS).split(",")})
+            alpha = float(request.query_params.get("alpha", 0.05))
+            max_points = int(request.query_params.get("max_points", self.DEFAULT_MAX_POINTS))
+        except ValueError:
+            return Response(
+                {"detail": "windows must be comma-separated integers; alpha and max_points must be numbers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if windows[0] < 2 or not 0 < alpha < 1 or max_points < 2:
+            return Response(
+                {"detail": "windows must be >= 2, alpha in (0, 1) and max_points >= 2."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stocks = portfolio.stocks.all()
+        price_matrix = load_price_matrix(portfolio, [stock.symbol for stock in stocks])
+
+        X = price_matrix.ffill().pct_change().dropna()
+        if X.empty:
+            return Response(
+                {"detail": "Not enough historical data to compute returns."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Equal weights, as in PortfolioRiskAPIView
+        portfolio_returns = X.to_numpy() @ np.full(X.shape[1], 1 / X.shape[1])
+        dates = X.index.astype(str)
+
+        series = {}
+        for window in windows:
+            measures = rolling_risk(portfolio_returns, window, alpha=alpha)
+            window_dates = dates[window - 1:]
+            keep = downsample_indices(len(window_dates), max_points)
+            series[str(window)] = {
+                "dates": window_dates[keep].tolist(),
+                **{name: values[keep].tolist() for name, values in measures.items()},
+            }
+
+        return Response({
+            "portfolio_id": portfolio.id,
+            "alpha": alpha,
+            "windows": series,
+        })
+
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def _stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(["symbol", "date", "adjusted_close"])
+    for symbol, date_obj, price in rows:
+        yield writer.writerow([symbol, date_obj.isoformat(), price])
+
+
+def _stream_ndjson(rows):
+    for symbol, date_obj, price in rows:
+        yield json.dumps({"symbol": symbol, "date": date_obj.isoformat(), "adjusted_close": price}) + "\n"
+
+
+class PortfolioHistoryExportAPIView(APIView):
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVStreamRenderer, NDJSONStreamRenderer]
+
+    def get(self, request, portfolio_id):
+        portfolio = get_object_or_404(
+            Portfolio,
+            id=portfolio_id,
+            fund_manager__user=request.user
+        )
+
+        try:
+            start = date.fromisoformat(request.query_params["start"]) if request.query_params.get("start") else None
+            end = date.fromisoformat(request.query_params["end"]) if request.query_params.get("end") else None
+        except ValueError:
+            return Response(
+                {"detail": "start and end must be dates (YYYY-MM-DD)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        symbols = set(portfolio.stocks.values_list("symbol", flat=True))
+        if request.query_params.get("symbols"):
+            symbols &= {s.strip() for s in request.query_params["symbols"].split(",")}
+
+        rows = iter_history_rows(symbols, start, end)
+        fmt = request.accepted_renderer.format
+        stream = _stream_csv(rows) if fmt == "csv" else _stream_ndjson(rows)
+
+        response = StreamingHttpResponse(stream, content_type=request.accepted_renderer.media_type)
+        response["Content-Disposition"] = f'attachment; filename="portfolio-{portfolio.id}-history.{fmt}"'
+        return response
@@ -0,0 +1,140 @@
+import msgpack
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+
+def _epoch_seconds(dates):
+    return np.array(dates, dtype="datetime64[D]").astype("datetime64[s]").astype(np.int64)
+
+
+def _is_date_list(value):
+    return isinstance(value, list) and (not value or isinstance(value[0], str))
+
+
+def _is_point_list(value):
+    return (
+        isinstance(value, list) and value and
+        all(isinstance(point, dict) and point.keys() == {"x", "y"} for point in value)
+    )
+
+
+def _is_series_group(value):
+    return bool(value) and all(
+        isinstance(series, dict) and series.keys() == {"dates", "prices"} for series in value.values()
+    )
+
+
+def to_columnar(data):
+    """
+    Rewrite the date series of a response as columns:
+    - {"dates": [...], name: [...], ...} -> epoch-second int64 dates + float64 columns
+    - [{"x": date, "y": value}, ...] -> {"dates": int64, "values": float64}
+    - {symbol: {"dates", "prices"}, ...} -> one shared date column plus one
+      float64 column per symbol (NaN where a symbol has no price that day)
+    Everything else is passed through unchanged.
+    """
+    if isinstance(data, dict):
+        if _is_series_group(data):
+            dates = np.unique(np.concatenate([_epoch_seconds(s["dates"]) for s in data.values()]))
+            columns = {}
+            for symbol, series in data.items():
+                column = np.full(len(dates), np.nan)
+                column[np.searchsorted(dates, _epoch_seconds(series["dates"]))] = series["prices"]
+                columns[symbol] = column
+            return {"dates": dates, "series": columns}
+        if _is_date_list(data.get("dates")):
+            return {
+                key: _epoch_seconds(value) if key == "dates" else np.asarray(value, dtype=np.float64)
+                for key, value in data.items()
+            }
+        return {key: to_columnar(value) for key, value in data.items()}
+    if _is_point_list(data):
+        return {
+            "dates": _epoch_seconds([point["x"] for point in data]),
+            "values": np.array([point["y"] for point in data], dtype=np.float64),
+        }
+    if isinstance(data, list):
+        return [to_columnar(value) for value in data]
+    return data
+
+
+def _json_ready(value):
+    if isinstance(value, dict):
+        return {key: _json_ready(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_ready(item) for item in value]
+    if isinstance(value, np.ndarray) and value.ndim == 1 and value.dtype == np.float64:
+        # Strict JSON has no NaN
+        return [None if np.isnan(item) else item for item in value.tolist()]
+    return value
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON with series as parallel arrays: epoch-second dates plus one value
+    array per series. Select with ``Accept: application/vnd.columnar+json``
+    or ``?format=columnar``.
+    """
+    media_type = "application/vnd.columnar+json"
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(_json_ready(to_columnar(data)), accepted_media_type, renderer_context)
+
+
+def _msgpack_default(value):
+    if isinstance(value, np.ndarray):
+        if value.ndim == 1 and value.dtype in (np.int64, np.float64):
+            # Raw little-endian buffer; clients view it as BigInt64Array/Float64Array
+            return value.astype(value.dtype.newbyteorder("<"), copy=False).tobytes()
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class ColumnarMsgpackRenderer(BaseRenderer):
+    """
+    MessagePack version of ColumnarJSONRenderer. Date columns are int64 and
+    value columns float64 raw buffers (bin), so they load without parsing.
+    Select with ``Accept: application/x-msgpack`` or ``?format=msgpack``.
+    """
+    media_type = "application/x-msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(to_columnar(data), default=_msgpack_default)
+
+
+class _StreamRenderer(BaseRenderer):
+    """
+    Negotiation target for streaming exports. Views stream the body
+    themselves, so this only renders error payloads.
+    """
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return "\n".join(f"{key}: {value}" for key, value in data.items()) + "\n"
+        return str(data or "")
+
+
+class CSVStreamRenderer(_StreamRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONStreamRenderer(_StreamRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+SERIES_RENDERER_CLASSES = api_settings.DEFAULT_RENDERER_CLASSES + [
+    ColumnarJSONRenderer,
+    ColumnarMsgpackRenderer,
+]
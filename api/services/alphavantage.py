@@ -1,62 +1,117 @@
-import os
-from datetime import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-from django.core.cache import cache
 
-from api.services.models import HistoricalStockData
+from api.services import instrumentation
+from api.services.alphavantage_client import AlphaVantageClient, AlphaVantageError
+from api.services.history import (
+    adjustments_changed,
+    bulk_upsert_history,
+    latest_stored_date,
+    parse_daily_series,
+)
+from api.services.metrics import LIVE_PRICE_LOOKUPS
+from api.services.tiered_cache import TieredCache
 
+LIVE_PRICE_TIMEOUT = 3600
+LIVE_PRICE_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+# One rate-limited client (and pooled session) for every Alpha Vantage call
+client = AlphaVantageClient(pool_size=LIVE_PRICE_WORKERS)
+
+# Process-local L1 in front of the shared cache for quotes and fetch markers
+price_cache = TieredCache()
+
+
+def _live_price_key(symbol):
+    return f"live_price:{symbol}"
 
-def get_cached_live_price(symbol):
-    cache_key = f"live_price:{symbol}"
-    if (cached := cache.get(cache_key)) is not None:
-        return float(cached)
 
-    api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
-    url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey={api_key}"
+def _fetch_live_price(symbol):
     try:
-        res = requests.get(url, timeout=10)
-        res.raise_for_status()
-        price_str = res.json().get("Global Quote", {}).get("05. price")
-        if price_str:
-            price = float(price_str)
-            cache.set(cache_key, price, timeout=3600)
-            return price
-    except Exception as e:
-        print(f"Live price error for {symbol}: {e}")
+        return client.global_quote(symbol)
+    except (AlphaVantageError, requests.RequestException, ValueError) as e:
+        logger.warning("Live price error for %s: %s", symbol, e)
     return None
 
 
-def fetch_and_store_historical(stock):
-    symbol = stock.symbol
-    portfolio = stock.portfolio
+def _load_live_price(symbol):
+    return price_cache.get_or_set(
+        _live_price_key(symbol), lambda: _fetch_live_price(symbol), LIVE_PRICE_TIMEOUT)
+
+
+def get_cached_live_prices(symbols):
+    """
+    Resolve live prices for many symbols at once.
+    Cache hits come from a single tiered get_many; misses are fetched
+    concurrently (at most LIVE_PRICE_WORKERS at a time), each through a
+    single-flight load so only one worker refetches an expired symbol.
+    :param symbols: Iterable of ticker symbols, duplicates allowed
+    :return: Dictionary of symbol -> price (None when unavailable)
+    """
+    keys = {_live_price_key(symbol): symbol for symbol in symbols}
+    prices = {keys[key]: float(value) for key, value in price_cache.get_many(keys).items()}
+
+    misses = [symbol for symbol in keys.values() if symbol not in prices]
+    LIVE_PRICE_LOOKUPS.inc(len(prices), result="hit")
+    LIVE_PRICE_LOOKUPS.inc(len(misses), result="miss")
+    if len(misses) == 1:
+        fetched = {misses[0]: _load_live_price(misses[0])}
+    elif misses:
+        with ThreadPoolExecutor(max_workers=min(LIVE_PRICE_WORKERS, len(misses))) as pool:
+            load = instrumentation.in_current_request(_load_live_price)
+            fetched = dict(zip(misses, pool.map(load, misses)))
+    else:
+        fetched = {}
+
+    prices.update(fetched)
+    return prices
+
+
+def get_cached_live_price(symbol):
+    return get_cached_live_prices([symbol])[symbol]
+
+
+def _fetch_daily_series(symbol, outputsize):
+    return parse_daily_series(client.daily_adjusted(symbol, outputsize=outputsize))
+
+
+def fetch_and_store_historical(symbol):
+    """
+    Bring the stored series for ``symbol`` up to date.
+    Symbols with history only fetch the compact (~100 day) window and upsert
+    dates past the high-water mark; a full reload happens for new symbols, when
+    the compact window doesn't reach back to the mark, or when adjusted closes
+    in the overlap have been restated (split/dividend).
+    """
     cache_key = f"hist_data:fetched:{symbol}"
 
-    if cache.get(cache_key):
+    if price_cache.get(cache_key):
         return True
 
-    api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
-    url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY_ADJUSTED&symbol={symbol}&outputsize=full&apikey={api_key}"
-
     try:
-        res = requests.get(url, timeout=10)
-        res.raise_for_status()
-        data = res.json().get("Time Series (Daily)", {})
-
-        for date_str, values in data.items():
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            price = float(values.get("5. adjusted close", 0))
-
-            HistoricalStockData.objects.update_or_create(
-                portfolio=portfolio,
-                symbol=symbol,
-                date=date_obj,
-                defaults={"adjusted_close": price}
-            )
-
-        cache.set(cache_key, True, timeout=43200)  # 12 hours
+        high_water_mark = latest_stored_date(symbol)
+
+        if high_water_mark is None:
+            rows = _fetch_daily_series(symbol, "full")
+        else:
+            rows = _fetch_daily_series(symbol, "compact")
+            overlap = [row for row in rows if row[0] <= high_water_mark]
+
+            if not overlap or adjustments_changed(symbol, overlap):
+                rows = _fetch_daily_series(symbol, "full")
+            else:
+                rows = [row for row in rows if row[0] > high_water_mark]
+
+        counts = bulk_upsert_history(symbol, rows)
+        logger.debug("Hist stored for %s: %d inserted, %d updated", symbol, counts["inserted"], counts["updated"])
+
+        price_cache.set(cache_key, True, timeout=43200)  # 12 hours
         return True
 
-    except Exception as e:
-        print(f"Hist fetch error for {symbol}: {e}")
+    except (AlphaVantageError, requests.RequestException, ValueError) as e:
+        logger.warning("Hist fetch error for %s: %s", symbol, e)
         return False
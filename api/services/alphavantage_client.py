@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+from api.services import instrumentation
+from api.services.metrics import ALPHAVANTAGE_ERRORS, ALPHAVANTAGE_REQUESTS, ALPHAVANTAGE_THROTTLED
+
+DEFAULT_BASE_URL = "https://www.alphavantage.co/query"
+THROTTLE_KEYS = ("Note", "Information")
+
+
+class AlphaVantageError(Exception):
+    pass
+
+
+class AlphaVantageThrottled(AlphaVantageError):
+    pass
+
+
+class SharedTokenBucket:
+    """
+    Quota shared by every worker through the Django cache.
+    Each bucket holds ``capacity`` tokens and refills completely at the start of
+    each ``period``; taking a token is one atomic cache ``incr`` on the counter
+    of the current period, so the cache must be shared by all workers (see the
+    api.E001 system check).
+    """
+
+    def __init__(self, name, capacity, period, backend=None):
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self.backend = backend or cache
+
+    def _key(self, now):
+        return f"av_quota:{self.name}:{int(now // self.period)}"
+
+    def try_acquire(self, now=None):
+        """
+        :param now: Timestamp of the attempt; pass the same one to release()
+        :return: 0 if a token was taken, otherwise seconds until the bucket refills
+        """
+        now = time.time() if now is None else now
+        key = self._key(now)
+        self.backend.add(key, 0, timeout=self.period * 2)
+        try:
+            used = self.backend.incr(key)
+        except ValueError:
+            # Counter expired between add() and incr(); start the window again
+            self.backend.set(key, 1, timeout=self.period * 2)
+            used = 1
+        if used <= self.capacity:
+            return 0
+        return (int(now // self.period) + 1) * self.period - now
+
+    def release(self, now):
+        """Give back a token taken by try_acquire(now) that was not spent."""
+        try:
+            self.backend.decr(self._key(now))
+        except ValueError:
+            pass  # The window expired along with the token
+
+
+class AlphaVantageClient:
+    """
+    Alpha Vantage client shared by the whole process.
+    - Calls go through one pooled requests.Session.
+    - Every call takes a token from the shared per-minute and per-day buckets.
+    - Concurrent identical calls (same function, symbol and parameters) are
+      coalesced into a single HTTP request.
+    - "Note"/"Information" throttle payloads are retried with exponential backoff.
+    """
+
+    def __init__(self, api_key=None, base_url=None, session=None,
+                 per_minute=None, per_day=None, max_wait=15, max_retries=3,
+                 backoff=2.0, pool_size=8, timeout=10):
+        self.api_key = api_key or os.getenv("ALPHA_VANTAGE_API_KEY")
+        self.base_url = base_url or os.getenv("ALPHA_VANTAGE_URL", DEFAULT_BASE_URL)
+        self.timeout = timeout
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+        self.minute_bucket = SharedTokenBucket(
+            "minute", per_minute or int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", 5)), 60)
+        self.day_bucket = SharedTokenBucket(
+            "day", per_day or int(os.getenv("ALPHA_VANTAGE_CALLS_PER_DAY", 500)), 86400)
+
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    def query(self, function, symbol, **params):
+        """
+        Run one API call, sharing the result with identical concurrent calls.
+        :return: Decoded JSON payload
+        :raises AlphaVantageThrottled: Quota exhausted or still throttled after retries
+        :raises AlphaVantageError: Error payload from the API
+        """
+        key = (function, symbol, tuple(sorted(params.items())))
+
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            future.set_result(self._request(function, symbol, params))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def _acquire_token(self):
+        acquired_at = time.time()
+        if self.day_bucket.try_acquire(acquired_at):
+            raise AlphaVantageThrottled("Daily Alpha Vantage quota exhausted")
+
+        deadline = time.monotonic() + self.max_wait
+        while wait := self.minute_bucket.try_acquire():
+            if time.monotonic() + wait > deadline:
+                # No request goes out, so the daily token is not spent
+                self.day_bucket.release(acquired_at)
+                raise AlphaVantageThrottled("Per-minute Alpha Vantage quota exhausted")
+            time.sleep(wait)
+
+    def _request(self, function, symbol, params):
+        query = {"function": function, "symbol": symbol, **params, "apikey": self.api_key}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with instrumentation.timed("quota"):
+                    self._acquire_token()
+            except AlphaVantageThrottled:
+                ALPHAVANTAGE_THROTTLED.inc(function=function, source="quota")
+                raise
+
+            ALPHAVANTAGE_REQUESTS.inc(function=function)
+            try:
+                with instrumentation.timed("upstream"):
+                    res = self.session.get(self.base_url, params=query, timeout=self.timeout)
+                res.raise_for_status()
+                payload = res.json()
+            except (requests.RequestException, ValueError):
+                ALPHAVANTAGE_ERRORS.inc(function=function, reason="http")
+                raise
+
+            if "Error Message" in payload:
+                ALPHAVANTAGE_ERRORS.inc(function=function, reason="api")
+                raise AlphaVantageError(payload["Error Message"])
+
+            throttle = next((payload[k] for k in THROTTLE_KEYS if k in payload), None)
+            if throttle is None:
+                return payload
+            instrumentation.count("upstream_throttled")
+            ALPHAVANTAGE_THROTTLED.inc(function=function, source="api")
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * 2 ** attempt)
+
+        raise AlphaVantageThrottled(throttle)
+
+    def global_quote(self, symbol):
+        """
+        :return: Latest price, or None when the quote is empty
+        """
+        price_str = self.query("GLOBAL_QUOTE", symbol).get("Global Quote", {}).get("05. price")
+        return float(price_str) if price_str else None
+
+    def daily_adjusted(self, symbol, outputsize="compact"):
+        """
+        :return: Raw "Time Series (Daily)" mapping
+        """
+        payload = self.query("TIME_SERIES_DAILY_ADJUSTED", symbol, outputsize=outputsize)
+        return payload.get("Time Series (Daily)", {})
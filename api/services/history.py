@@ -0,0 +1,110 @@
+import math
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Max
+
+from api.portfolio.utils.pricematrix import invalidate_price_matrices
+from api.services.metrics import HISTORY_DURATION, HISTORY_ROWS
+from api.services.models import HistoricalStockData
+
+HISTORY_BATCH_SIZE = 1000
+ADJUSTMENT_REL_TOL = 1e-6
+
+
+def parse_daily_series(series):
+    """
+    Parse an Alpha Vantage "Time Series (Daily)" mapping.
+    :param series: {"YYYY-MM-DD": {"5. adjusted close": "..."}, ...}
+    :return: List of (date, adjusted_close) tuples sorted by date
+    """
+    rows = [
+        (datetime.strptime(date_str, "%Y-%m-%d").date(),
+         float(values.get("5. adjusted close", 0)))
+        for date_str, values in series.items()
+    ]
+    rows.sort()
+    return rows
+
+
+def bulk_upsert_history(symbol, rows, batch_size=HISTORY_BATCH_SIZE):
+    """
+    Insert or update the daily series of ``symbol`` in chunks of ``batch_size``.
+    :param rows: Date-sorted (date, adjusted_close) tuples
+    :return: Dictionary with the number of rows inserted and updated
+    """
+    inserted = updated = 0
+
+    with HISTORY_DURATION.time(), transaction.atomic():
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            existing = set(
+                HistoricalStockData.objects.filter(
+                    symbol=symbol,
+                    date__range=(chunk[0][0], chunk[-1][0]),
+                ).values_list("date", flat=True)
+            )
+
+            HistoricalStockData.objects.bulk_create(
+                [
+                    HistoricalStockData(symbol=symbol, date=date, adjusted_close=price)
+                    for date, price in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=["symbol", "date"],
+                update_fields=["adjusted_close"],
+            )
+
+            chunk_updated = sum(1 for date, _ in chunk if date in existing)
+            updated += chunk_updated
+            inserted += len(chunk) - chunk_updated
+
+        if rows:
+            invalidate_price_matrices(symbol)
+
+    HISTORY_ROWS.inc(len(rows))
+    return {"inserted": inserted, "updated": updated}
+
+
+def latest_stored_date(symbol):
+    """High-water mark of the stored series for ``symbol`` (None if empty)."""
+    return HistoricalStockData.objects.filter(symbol=symbol).aggregate(
+        last=Max("date"))["last"]
+
+
+def adjustments_changed(symbol, overlap, rel_tol=ADJUSTMENT_REL_TOL):
+    """
+    Compare freshly fetched rows against what is already stored for the same dates.
+    A split or dividend rewrites past adjusted closes, so any drift means the
+    stored series is stale and needs a full reload.
+    :param overlap: Date-sorted (date, adjusted_close) tuples at or before the high-water mark
+    """
+    if not overlap:
+        return False
+
+    stored = dict(
+        HistoricalStockData.objects.filter(
+            symbol=symbol,
+            date__range=(overlap[0][0], overlap[-1][0]),
+        ).values_list("date", "adjusted_close")
+    )
+    return any(
+        date in stored and not math.isclose(stored[date], price, rel_tol=rel_tol)
+        for date, price in overlap
+    )
+
+
+def iter_history_rows(symbols, start=None, end=None, chunk_size=HISTORY_BATCH_SIZE):
+    """
+    Stream (symbol, date, adjusted_close) tuples ordered by symbol and date.
+    Rows are fetched ``chunk_size`` at a time, so memory stays flat however
+    long the history is.
+    """
+    rows = HistoricalStockData.objects.filter(symbol__in=symbols)
+    if start:
+        rows = rows.filter(date__gte=start)
+    if end:
+        rows = rows.filter(date__lte=end)
+
+    return rows.order_by("symbol", "date").values_list(
+        "symbol", "date", "adjusted_close").iterator(chunk_size=chunk_size)
@@ -0,0 +1,90 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Counters and stage timings collected while serving one request.
+    Stages accumulate, so a stage entered several times (one upstream call
+    per symbol, say) reports its total duration and how often it ran.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counters = defaultdict(int)
+        self.durations = defaultdict(float)  # Stage -> seconds
+        self.calls = defaultdict(int)  # Stage -> times entered
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.durations[stage] += seconds
+            self.calls[stage] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    """
+    :return: RequestMetrics of the request being served, or None outside a sampled request
+    """
+    return _current.get()
+
+
+@contextmanager
+def collecting(metrics):
+    """Make ``metrics`` the current RequestMetrics for the enclosed block."""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(stage):
+    """
+    Add the duration of the enclosed block to ``stage`` of the current request.
+    Costs one context-variable lookup when nothing is being collected.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record(stage, time.perf_counter() - started)
+
+
+def count(name, amount=1):
+    """Increment counter ``name`` of the current request, if any."""
+    if (metrics := _current.get()) is not None:
+        metrics.count(name, amount)
+
+
+def in_current_request(func):
+    """
+    Wrap ``func`` so that calls from pool threads record into the request
+    that created the wrapper (context variables don't follow executor jobs).
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        with collecting(metrics):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,277 @@
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+FLUSH_INTERVAL = 5  # seconds between pushes of a process's deltas to the shared cache
+INDEX_COUNT_KEY = "metrics:index:count"
+SUM_SCALE = 1_000_000  # Histogram sums are kept in micro-units so cache incr() stays integer
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(value):
+    # Label values are free-form; hash them into a key every backend accepts
+    return hashlib.md5(repr(value).encode()).hexdigest()
+
+
+def _cache_key(series, field):
+    return "metrics:" + _digest((series, field))
+
+
+def _slot_key(slot):
+    return f"metrics:index:{slot}"
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms shared by every worker process.
+    Observations are summed in memory, and a background thread pushes them
+    to the Django cache every ``flush_interval`` seconds as one atomic
+    ``incr`` per changed value, so gunicorn workers (and job workers)
+    aggregate into the same totals. The cache must be shared with atomic
+    incr(), i.e. Redis or Memcached (see the api.E001 system check).
+    The series ever written are listed in numbered index slots claimed from
+    an atomic counter, so concurrent processes never overwrite each other's
+    index entries.
+    """
+
+    def __init__(self, backend=None, flush_interval=FLUSH_INTERVAL):
+        self.backend = backend or cache
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self._pending = defaultdict(int)
+        self._series = set()
+        self._indexed = set()
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add(self, series, deltas):
+        with self._lock:
+            self._series.add(series)
+            for field, delta in deltas.items():
+                self._pending[(series, field)] += delta
+            if self._flusher_pid != os.getpid():
+                # First observation in this process (or in a forked worker,
+                # which does not inherit the parent's thread)
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_periodically, name="metrics-flush", daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            unindexed = self._series - self._indexed
+        if not pending and not unindexed:
+            return
+
+        try:
+            for (name, field), delta in pending.items():
+                key = _cache_key(name, field)
+                self.backend.add(key, 0, timeout=None)
+                try:
+                    self.backend.incr(key, delta)
+                except ValueError:
+                    # Evicted between add() and incr()
+                    self.backend.set(key, delta, timeout=None)
+
+            for series in unindexed:
+                self._index(series)
+                with self._lock:
+                    self._indexed.add(series)
+        except Exception as e:
+            # Metrics must never fail the request that recorded them
+            logger.warning("Metrics flush failed: %s", e)
+
+    def _index(self, series):
+        """
+        Record ``series`` in a fresh index slot unless another process already
+        has. The slot is written before the marker, so a crash in between
+        only leaves a duplicate entry that read() folds away.
+        """
+        marker = "metrics:indexed:" + _digest(series)
+        if self.backend.get(marker) is not None:
+            return
+        self.backend.add(INDEX_COUNT_KEY, 0, timeout=None)
+        slot = self.backend.incr(INDEX_COUNT_KEY)
+        self.backend.set(_slot_key(slot), series, timeout=None)
+        if not self.backend.add(marker, slot, timeout=None):
+            self.backend.delete(_slot_key(slot))  # Lost the race; the winner's slot stays
+
+    def _read_index(self):
+        slots = self.backend.get(INDEX_COUNT_KEY) or 0
+        return set(self.backend.get_many([_slot_key(slot) for slot in range(1, slots + 1)]).values())
+
+    def read(self):
+        """
+        :return: Dictionary of metric name -> {labels: {field: value}} with the
+            totals of all processes
+        """
+        self.flush()
+        wanted = {
+            (series, field): _cache_key(series, field)
+            for series in self._read_index() if series[0] in self.metrics
+            for field in self.metrics[series[0]].fields()
+        }
+        stored = self.backend.get_many(list(wanted.values()))
+
+        totals = defaultdict(lambda: defaultdict(dict))
+        for ((name, labels), field), key in wanted.items():
+            totals[name][labels][field] = stored.get(key, 0)
+        return totals
+
+
+REGISTRY = MetricsRegistry()
+atexit.register(REGISTRY.flush)
+
+
+def _labels(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple((name, str(labels[name])) for name in labelnames)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def fields(self):
+        return ("value",)
+
+    def inc(self, amount=1, **labels):
+        self.registry.add((self.name, _labels(self.labelnames, labels)), {"value": amount})
+
+    def samples(self, labels, values):
+        yield self.name, labels, values["value"]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.registry = registry
+        registry.register(self)
+
+    def fields(self):
+        return tuple(f"bucket{i}" for i in range(len(self.buckets) + 1)) + ("sum", "count")
+
+    def observe(self, value, **labels):
+        self.registry.add((self.name, _labels(self.labelnames, labels)), {
+            f"bucket{bisect_left(self.buckets, value)}": 1,
+            "sum": round(value * SUM_SCALE),
+            "count": 1,
+        })
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self, labels, values):
+        cumulative = 0
+        for i, bound in enumerate(self.buckets + (float("inf"),)):
+            cumulative += values[f"bucket{i}"]
+            yield f"{self.name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+        yield f"{self.name}_sum", labels, values["sum"] / SUM_SCALE
+        yield f"{self.name}_count", labels, values["count"]
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by URL name.", ("view", "method"))
+ALPHAVANTAGE_REQUESTS = Counter(
+    "alphavantage_requests_total", "HTTP requests sent to Alpha Vantage.", ("function",))
+ALPHAVANTAGE_ERRORS = Counter(
+    "alphavantage_errors_total", "Failed Alpha Vantage calls (reason: http or api).", ("function", "reason"))
+ALPHAVANTAGE_THROTTLED = Counter(
+    "alphavantage_throttled_total",
+    "Throttle events (source: quota for our token buckets, api for Note/Information replies).",
+    ("function", "source"))
+LIVE_PRICE_LOOKUPS = Counter(
+    "live_price_cache_lookups_total", "Live price lookups by cache result (hit or miss).", ("result",))
+HISTORY_ROWS = Counter("history_ingestion_rows_total", "Historical price rows upserted.")
+HISTORY_DURATION = Histogram("history_ingestion_duration_seconds", "Duration of one history upsert.")
+SOLVE_DURATION = Histogram(
+    "optimization_solve_duration_seconds", "Portfolio optimization solve time by model.", ("model",))
+SOLVE_TIMEOUTS = Counter(
+    "optimization_solve_timeouts_total", "Solves abandoned after their time budget, by model.", ("model",))
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample_line(name, labels, value):
+    if labels:
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+        return f"{name}{{{label_text}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else 0.0
+
+
+def render_metrics(registry=REGISTRY):
+    """
+    :return: Every metric in the Prometheus text exposition format (0.0.4),
+        followed by gauges derived from them: the live-price cache hit ratio
+        and historical ingestion rows per second
+    """
+    totals = registry.read()
+    lines = []
+    for name, metric in registry.metrics.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for labels, values in sorted(totals.get(name, {}).items()):
+            lines.extend(_sample_line(*sample) for sample in metric.samples(labels, values))
+
+    lookups = {
+        dict(labels)["result"]: values["value"]
+        for labels, values in totals.get(LIVE_PRICE_LOOKUPS.name, {}).items()
+    }
+    rows = sum(values["value"] for values in totals.get(HISTORY_ROWS.name, {}).values())
+    seconds = sum(values["sum"] for values in totals.get(HISTORY_DURATION.name, {}).values()) / SUM_SCALE
+    for name, documentation, value in (
+        ("live_price_cache_hit_ratio", "Share of live price lookups served from cache.",
+         _ratio(lookups.get("hit", 0), sum(lookups.values()))),
+        ("history_ingestion_rows_per_second", "Rows upserted per second spent upserting history.",
+         _ratio(rows, seconds)),
+    ):
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(_sample_line(name, (), float(value)))
+    return "\n".join(lines) + "\n"
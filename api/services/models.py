@@ -1,21 +1,32 @@
 from django.db import models
 
-from api.portfolio.models import Portfolio
+
+class HistoricalStockDataQuerySet(models.QuerySet):
+    def for_portfolio(self, portfolio):
+        """Rows for the symbols currently held in ``portfolio``."""
+        return self.filter(symbol__in=portfolio.stocks.values("symbol"))
 
 
 class HistoricalStockData(models.Model):
-    portfolio = models.ForeignKey(
-        Portfolio,
-        on_delete=models.CASCADE,
-        related_name="historical_data")
+    """
+    Canonical daily price series, shared by every portfolio holding the symbol.
+    Portfolios reach their history through their holdings (Stock.symbol).
+    """
     symbol = models.CharField(max_length=10)
     date = models.DateField()
     # Consider DecimalField for precision if needed
     adjusted_close = models.FloatField()
 
+    objects = HistoricalStockDataQuerySet.as_manager()
+
     class Meta:
-        unique_together = ('portfolio', 'symbol', 'date')
+        unique_together = ('symbol', 'date')
         ordering = ['date']  # Good for fetching ordered data
+        indexes = [
+            # Covers the (symbol, date, adjusted_close) reads of matrix builds,
+            # exports and high-water marks without touching the table
+            models.Index(fields=['symbol', 'date', 'adjusted_close'], name='hist_symbol_date_close_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.portfolio.name} - {self.symbol} - {self.date}: {self.adjusted_close}"
+        return f"{self.symbol} - {self.date}: {self.adjusted_close}"
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import cache as django_cache
+
+from api.services import instrumentation
+
+L1_MAX_ENTRIES = 1024
+L1_TTL = 10  # seconds; keeps L1 close to the shared cache
+LOCK_TIMEOUT = 15  # seconds; upper bound on one upstream load
+LOCK_POLL_INTERVAL = 0.1
+LOCK_STRIPES = 64
+
+
+class TieredCache:
+    """
+    Bounded in-process LRU (L1) in front of the shared Django cache (L2).
+    Hit and miss counters are kept per tier. get_or_set() adds single-flight
+    loading: one thread per process and one process across workers (via an
+    L2 ``add`` lock) runs the loader, the rest wait for its result.
+    """
+
+    def __init__(self, backend=None, max_entries=L1_MAX_ENTRIES, ttl=L1_TTL,
+                 lock_timeout=LOCK_TIMEOUT):
+        self.backend = backend or django_cache
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self._l1 = OrderedDict()
+        self._l1_lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._stats = Counter()
+
+    def stats(self):
+        with self._l1_lock:
+            return dict(self._stats)
+
+    def _count(self, name, amount=1):
+        with self._l1_lock:
+            self._stats[name] += amount
+
+    def _l1_get(self, key):
+        with self._l1_lock:
+            entry = self._l1.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._l1.pop(key, None)
+                return None
+            self._l1.move_to_end(key)
+            return entry[1]
+
+    def _l1_set(self, key, value, timeout):
+        ttl = self.ttl if timeout is None else min(self.ttl, timeout)
+        with self._l1_lock:
+            self._l1[key] = (time.monotonic() + ttl, value)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.max_entries:
+                self._l1.popitem(last=False)
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        :return: Dictionary of the keys found in either tier
+        """
+        found = self._lookup(keys)
+        instrumentation.count("cache_hits", len(found))
+        instrumentation.count("cache_misses", len(keys) - len(found))
+        return found
+
+    def _lookup(self, keys, counted=True):
+        # Only the public lookup updates the tier counters; internal re-checks
+        # of a key the caller already missed pass counted=False
+        found = {}
+        for key in keys:
+            if (value := self._l1_get(key)) is not None:
+                found[key] = value
+        if counted:
+            self._count("l1_hits", len(found))
+            self._count("l1_misses", len(keys) - len(found))
+
+        remaining = [key for key in keys if key not in found]
+        if remaining:
+            from_l2 = self.backend.get_many(remaining)
+            if counted:
+                self._count("l2_hits", len(from_l2))
+                self._count("l2_misses", len(remaining) - len(from_l2))
+            for key, value in from_l2.items():
+                self._l1_set(key, value, None)
+            found.update(from_l2)
+        return found
+
+    def set(self, key, value, timeout):
+        self.set_many({key: value}, timeout)
+
+    def set_many(self, mapping, timeout):
+        if not mapping:
+            return
+        self.backend.set_many(mapping, timeout=timeout)
+        for key, value in mapping.items():
+            self._l1_set(key, value, timeout)
+
+    def get_or_set(self, key, loader, timeout):
+        """
+        Return the cached value for ``key`` or load it with ``loader()``.
+        ``None`` results are not cached. Lookups here are counted neither in
+        stats() nor as request cache hits/misses; callers usually just missed
+        in get_many().
+        The key's lock stripe is held across the load, so a key sharing the
+        stripe can wait behind a slow upstream call. That wait is bounded by
+        ``lock_timeout``; past it the caller goes straight to the L2 lock.
+        """
+        if (value := self._lookup([key], counted=False).get(key)) is not None:
+            return value
+
+        stripe = self._key_locks[hash(key) % LOCK_STRIPES]
+        if not stripe.acquire(timeout=self.lock_timeout):
+            self._count("stripe_timeouts")
+            return self._load_single_flight(key, loader, timeout)
+        try:
+            return self._load_single_flight(key, loader, timeout)
+        finally:
+            stripe.release()
+
+    def _load_single_flight(self, key, loader, timeout):
+        # Another thread may have loaded it while we waited for the lock
+        if (value := self._lookup([key], counted=False).get(key)) is not None:
+            return value
+
+        lock_key = f"lock:{key}"
+        if self.backend.add(lock_key, 1, timeout=self.lock_timeout):
+            try:
+                return self._load(key, loader, timeout)
+            finally:
+                self.backend.delete(lock_key)
+
+        # Another worker holds the load; wait for it to publish the result
+        self._count("stampede_waits")
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            polled = self.backend.get_many([key, lock_key])
+            if (value := polled.get(key)) is not None:
+                self._l1_set(key, value, timeout)
+                return value
+            if lock_key not in polled:
+                break  # Released without a value, or the holder died
+        return self._load(key, loader, timeout)
+
+    def _load(self, key, loader, timeout):
+        self._count("loads")
+        value = loader()
+        if value is not None:
+            self.set(key, value, timeout)
+        return value
@@ -1,11 +1,19 @@
+from decimal import Decimal
+
 from django.db import models
 
+from api.portfolio.models import Portfolio
 from api.services.alphavantage import get_cached_live_price, fetch_and_store_historical
 
 
 class Stock(models.Model):
+    class HistoryStatus(models.TextChoices):
+        PENDING = "pending"
+        READY = "ready"
+        FAILED = "failed"
+
     portfolio = models.ForeignKey(
-        "Portfolio",
+        Portfolio,
         on_delete=models.CASCADE,
         related_name="stocks"
     )
@@ -14,9 +22,16 @@ class Stock(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    history_status = models.CharField(
+        max_length=10,
+        choices=HistoryStatus.choices,
+        default=HistoryStatus.PENDING)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['portfolio', 'symbol'], name='stock_portfolio_symbol_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.symbol})"
@@ -28,8 +43,25 @@ class Stock(models.Model):
         unit_price = self.price or self.get_live_price()
         return (unit_price or 0) * self.quantity
 
+    def add_lot(self, quantity, price=None, name=None):
+        """
+        Merge a purchase into this holding (in memory, not saved).
+        The price becomes the quantity-weighted average; a lot without a price
+        keeps the current one.
+        """
+        total_quantity = self.quantity + quantity
+
+        if price and total_quantity:
+            self.price = (
+                (self.price or Decimal('0')) * self.quantity +
+                Decimal(price) * quantity
+            ) / total_quantity
+
+        self.quantity = total_quantity
+        self.name = name or self.name
+
     def get_live_price(self):
         return get_cached_live_price(self.symbol)
 
     def fetch_and_store_historical_data(self):
-        return fetch_and_store_historical(self)
+        return fetch_and_store_historical(self.symbol)
@@ -1,23 +1,60 @@
 from rest_framework import serializers
 
+from api.services.alphavantage import get_cached_live_prices
 from api.stock.models import Stock
 
 
+class StockListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Resolve quotes for the whole page up front, so each child reads from
+        # the shared "live_prices" context instead of hitting the cache per stock.
+        stocks = list(data.all() if hasattr(data, "all") else data)
+        self.context.setdefault("live_prices", {}).update(
+            get_cached_live_prices(stock.symbol for stock in stocks))
+        return super().to_representation(stocks)
+
+
 class StockSerializer(serializers.ModelSerializer):
     total_value = serializers.SerializerMethodField()
     live_price = serializers.SerializerMethodField()
 
     class Meta:
         model = Stock
+        list_serializer_class = StockListSerializer
         fields = [
             'id', 'portfolio', 'symbol', 'name',
             'quantity', 'price', 'created_at',
-            'total_value', 'live_price',
+            'total_value', 'live_price', 'history_status',
         ]
-        read_only_fields = ['created_at', 'total_value', 'live_price']
+        read_only_fields = ['created_at', 'total_value', 'live_price', 'history_status']
+
+    def _live_price(self, obj):
+        live_prices = self.context.setdefault("live_prices", {})
+        if obj.symbol not in live_prices:
+            live_prices.update(get_cached_live_prices([obj.symbol]))
+        return live_prices[obj.symbol]
 
     def get_total_value(self, obj):
-        return obj.get_total_value()
+        unit_price = obj.price or self._live_price(obj)
+        return (unit_price or 0) * obj.quantity
 
     def get_live_price(self, obj):
-        return obj.get_live_price()
+        return self._live_price(obj)
+
+
+class StockImportResultSerializer(serializers.ModelSerializer):
+    """Imported holdings as stored, without the live quote StockSerializer adds."""
+
+    class Meta:
+        model = Stock
+        fields = [
+            'id', 'portfolio', 'symbol', 'name',
+            'quantity', 'price', 'created_at', 'history_status',
+        ]
+
+
+class StockImportRowSerializer(serializers.Serializer):
+    symbol = serializers.CharField(max_length=10)
+    name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    quantity = serializers.IntegerField(min_value=0)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
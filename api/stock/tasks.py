@@ -0,0 +1,59 @@
+import hashlib
+import time
+
+from api.jobs.queue import STALE_RUNNING_AFTER, enqueue, register
+from api.services.alphavantage import fetch_and_store_historical
+from api.stock.models import Stock
+
+FETCH_HISTORY = "fetch_history"
+FETCH_HISTORY_BATCH = "fetch_history_batch"
+# A batch hands what is left to a follow-up job well before workers would
+# reclaim it as stale
+BATCH_TIME_BUDGET = STALE_RUNNING_AFTER.total_seconds() / 2
+
+
+def _mark_history_failed(symbol):
+    Stock.objects.filter(symbol=symbol).update(history_status=Stock.HistoryStatus.FAILED)
+
+
+@register(FETCH_HISTORY, on_failure=_mark_history_failed)
+def fetch_history(symbol):
+    if not fetch_and_store_historical(symbol):
+        raise RuntimeError(f"Historical fetch failed for {symbol}")
+    Stock.objects.filter(symbol=symbol).update(history_status=Stock.HistoryStatus.READY)
+
+
+@register(FETCH_HISTORY_BATCH)
+def fetch_history_batch(symbols):
+    """
+    Fetch the history of many symbols in one job, one after another under the
+    shared Alpha Vantage quota. Symbols that fail get their own retried
+    fetch_history job; symbols left when BATCH_TIME_BUDGET runs out go to a
+    follow-up batch.
+    """
+    deadline = time.monotonic() + BATCH_TIME_BUDGET
+    fetched, failed = [], []
+    for i, symbol in enumerate(symbols):
+        if time.monotonic() > deadline:
+            enqueue_history_batch(symbols[i:])
+            break
+        if fetch_and_store_historical(symbol):
+            fetched.append(symbol)
+        else:
+            failed.append(symbol)
+            enqueue_history_fetch(symbol)
+
+    Stock.objects.filter(symbol__in=fetched).update(history_status=Stock.HistoryStatus.READY)
+    return {"fetched": len(fetched), "failed": failed, "deferred": len(symbols) - len(fetched) - len(failed)}
+
+
+def enqueue_history_fetch(symbol):
+    """Queue a history fetch for ``symbol``; at most one is active per symbol."""
+    return enqueue(FETCH_HISTORY, symbol, payload={"symbol": symbol})
+
+
+def enqueue_history_batch(symbols):
+    """Queue one job fetching the history of all ``symbols`` in turn."""
+    symbols = sorted(set(symbols))
+    key = hashlib.md5(",".join(symbols).encode()).hexdigest()
+    return enqueue(FETCH_HISTORY_BATCH, key, payload={"symbols": symbols})
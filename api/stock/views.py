@@ -1,14 +1,18 @@
-from decimal import Decimal
+import csv
+import io
 
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from api.portfolio.models import Portfolio
 from api.stock.models import Stock
-from api.stock.serializers import StockSerializer
+from api.stock.serializers import StockImportResultSerializer, StockImportRowSerializer, StockSerializer
+from api.stock.tasks import enqueue_history_batch, enqueue_history_fetch
 
 
 class StockViewSet(viewsets.ModelViewSet):
@@ -43,19 +47,7 @@ class StockViewSet(viewsets.ModelViewSet):
         existing_stock = portfolio.stocks.filter(symbol=symbol).first()
 
         if existing_stock:
-            price_decimal = Decimal(price) if price else Decimal('0')
-            existing_price = existing_stock.price or Decimal('0')
-
-            total_quantity = existing_stock.quantity + quantity
-
-            weighted_price = (
-                                     existing_price * existing_stock.quantity +
-                                     price_decimal * quantity
-                             ) / total_quantity if price else existing_stock.price
-
-            existing_stock.quantity = total_quantity
-            existing_stock.price = weighted_price
-            existing_stock.name = name or existing_stock.name
+            existing_stock.add_lot(quantity, price, name)
             existing_stock.save()
 
             serializer = self.get_serializer(existing_stock)
@@ -64,7 +56,7 @@ class StockViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         stock = serializer.save(portfolio=portfolio)
-        stock.fetch_and_store_historical_data()
+        enqueue_history_fetch(stock.symbol)
 
         headers = self.get_success_headers(serializer.data)
         return Response(
@@ -73,3 +65,56 @@ class StockViewSet(viewsets.ModelViewSet):
             headers=headers
         )
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_import(self, request):
+        """
+        Import many holdings into one portfolio.
+        Accepts JSON {"portfolio": id, "holdings": [{symbol, name, quantity, price}, ...]}
+        or a multipart upload with a "portfolio" field and a CSV "file" with the
+        same columns. Duplicate symbols are merged like repeated creates.
+        """
+        portfolio = get_object_or_404(
+            Portfolio,
+            id=request.data.get("portfolio"),
+            fund_manager__user=request.user
+        )
+
+        if "file" in request.FILES:
+            rows = list(csv.DictReader(io.TextIOWrapper(request.FILES["file"], encoding="utf-8-sig")))
+        else:
+            rows = request.data.get("holdings")
+        if not isinstance(rows, list):
+            return Response(
+                {"error": "Provide a holdings list or a CSV file."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        row_serializer = StockImportRowSerializer(data=rows, many=True)
+        row_serializer.is_valid(raise_exception=True)
+
+        symbols = {row["symbol"] for row in row_serializer.validated_data}
+        existing = {stock.symbol: stock for stock in portfolio.stocks.filter(symbol__in=symbols)}
+        new = {}
+
+        for row in row_serializer.validated_data:
+            stock = existing.get(row["symbol"]) or new.get(row["symbol"])
+            if stock is None:
+                stock = new[row["symbol"]] = Stock(
+                    portfolio=portfolio, symbol=row["symbol"], name=row["symbol"], quantity=0)
+            stock.add_lot(row["quantity"], row.get("price"), row.get("name"))
+
+        with transaction.atomic():
+            Stock.objects.bulk_update(existing.values(), ["quantity", "price", "name"])
+            created = Stock.objects.bulk_create(new.values())
+
+        if new:
+            enqueue_history_batch(new)
+
+        # No live prices here: quoting hundreds of symbols under the API quota
+        # would hold the import for minutes. GET /api/stock/ prices them.
+        stocks = list(existing.values()) + created
+        return Response({
+            "created": len(created),
+            "updated": len(existing),
+            "stocks": StockImportResultSerializer(stocks, many=True).data,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from api.services.alphavantage_client import AlphaVantageClient, AlphaVantageThrottled
+
+
+class StubAlphaVantage(BaseHTTPRequestHandler):
+    """Answers /query from the server's ``replies`` list (the last one repeats)."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append({k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()})
+            reply = server.replies[min(len(server.requests), len(server.replies)) - 1]
+        time.sleep(server.delay)
+        body = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+QUOTE = {"Global Quote": {"01. symbol": "IBM", "05. price": "123.4500"}}
+
+
+class AlphaVantageClientTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubAlphaVantage)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.replies = [QUOTE]
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def make_client(self, **kwargs):
+        host, port = self.server.server_address
+        return AlphaVantageClient(api_key="test", base_url=f"http://{host}:{port}/query", **kwargs)
+
+    def test_global_quote(self):
+        self.assertEqual(self.make_client().global_quote("IBM"), 123.45)
+        self.assertEqual(self.server.requests, [{"function": "GLOBAL_QUOTE", "symbol": "IBM", "apikey": "test"}])
+
+    def test_identical_concurrent_calls_share_one_request(self):
+        self.server.delay = 0.2
+        client = self.make_client()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.global_quote("IBM"))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [123.45] * 5)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_throttle_note_is_retried(self):
+        self.server.replies = [{"Note": "Thank you for using Alpha Vantage!"}, QUOTE]
+        client = self.make_client(backoff=0)
+        self.assertEqual(client.global_quote("IBM"), 123.45)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_minute_quota_timeout_gives_back_the_day_token(self):
+        client = self.make_client(per_minute=2, per_day=10, max_wait=0)
+        client.global_quote("IBM")
+        client.global_quote("MSFT")
+        with self.assertRaises(AlphaVantageThrottled):
+            client.global_quote("AAPL")
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(cache.get(client.day_bucket._key(time.time())), 2)
+
+    def test_day_quota_is_shared_between_clients(self):
+        first = self.make_client(per_day=1)
+        second = self.make_client(per_day=1)
+        first.global_quote("IBM")
+        with self.assertRaises(AlphaVantageThrottled):
+            second.global_quote("MSFT")
+        self.assertEqual(len(self.server.requests), 1)
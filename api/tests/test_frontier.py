@@ -0,0 +1,57 @@
+from unittest import mock
+
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from api.portfolio.utils import frontier
+from api.portfolio.utils.frontier import _max_return_problem, efficient_frontier
+
+
+def make_returns(days=300, assets=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        rng.normal(0.0002 * np.arange(1, assets + 1), 0.004 * np.arange(1, assets + 1), (days, assets)),
+        columns=[f"S{i}" for i in range(assets)])
+
+
+class EfficientFrontierTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def assert_frontier(self, X, rm):
+        points = efficient_frontier(X, rm=rm, points=8)
+        self.assertEqual(len(points), 8)
+        risks = [point["risk"] for point in points]
+        self.assertTrue(all(a <= b + 1e-7 for a, b in zip(risks, risks[1:])))
+        for point in points:
+            weights = np.array(list(point["weights"].values()))
+            self.assertAlmostEqual(weights.sum(), 1, places=5)
+            self.assertGreaterEqual(weights.min(), 0)
+        return points
+
+    def test_warm_started_points_match_cold_solves(self):
+        X = make_returns()
+        for rm, solver in (("MV", "CLARABEL"), ("CVaR", "HIGHS")):
+            points = self.assert_frontier(X, rm)
+            returns = X.to_numpy()
+            for point in points[1:-1]:
+                # A fresh problem, solved once at this point's risk
+                problem, _, ceiling = _max_return_problem(
+                    X.mean().to_numpy(), returns, X.cov().to_numpy(), rm, 0.05)
+                ceiling.value = point["risk"]
+                problem.solve(solver=solver)
+                self.assertEqual(problem.status, cp.OPTIMAL)
+                self.assertAlmostEqual(point["return"], problem.value, delta=1e-6, msg=rm)
+
+    def test_frontier_with_failed_points_is_not_cached(self):
+        X = make_returns()
+        with mock.patch.object(frontier, "_solve", return_value=False):
+            self.assertEqual(len(efficient_frontier(X, points=8)), 2)  # Only the two ends
+
+        complete = efficient_frontier(X, points=8)
+        self.assertEqual(len(complete), 8)
+        with mock.patch.object(frontier, "_solve_frontier", side_effect=AssertionError("not cached")):
+            self.assertEqual(efficient_frontier(X, points=8), complete)
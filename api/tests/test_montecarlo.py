@@ -0,0 +1,133 @@
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+import riskfolio as rp
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from api.fund_manager.models import FundManager
+from api.institute.models import Institute
+from api.jobs.models import Job
+from api.portfolio.models import Portfolio
+from api.portfolio.tasks import MONTE_CARLO_RISK
+from api.portfolio.utils.montecarlo import TailAccumulator, monte_carlo_risk, parse_monte_carlo_options
+from api.services.history import bulk_upsert_history
+from api.stock.models import Stock
+
+
+def make_returns(days=250, symbols=("AAA", "BBB", "CCC"), seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(0.0005, 0.01, (days, len(symbols))), columns=list(symbols))
+
+
+def equal_weights(X):
+    return {symbol: 1 / len(X.columns) for symbol in X.columns}
+
+
+class TailAccumulatorTests(SimpleTestCase):
+    def test_uneven_chunks_match_the_whole_array(self):
+        values = np.random.default_rng(1).normal(0, 0.01, 10_001)
+        alpha = 0.05
+        accumulator = TailAccumulator(math.ceil(alpha * len(values)))
+        for chunk in np.split(values, [17, 6_000]):
+            accumulator.update(chunk)
+
+        var, cvar = accumulator.var_cvar(alpha)
+        self.assertAlmostEqual(var, rp.VaR_Hist(values, alpha=alpha), places=12)
+        self.assertAlmostEqual(cvar, rp.CVaR_Hist(values, alpha=alpha), places=12)
+        self.assertAlmostEqual(accumulator.std(), values.std(ddof=1), places=12)
+
+
+class MonteCarloRiskTests(SimpleTestCase):
+    def test_one_day_bootstrap_converges_to_historical(self):
+        X = make_returns()
+        series = X.to_numpy() @ np.full(3, 1 / 3)
+        result = monte_carlo_risk(X, equal_weights(X), "bootstrap", scenarios=400_000, seed=7, horizon=1, block=1)
+
+        self.assertAlmostEqual(result["VaR_95"], rp.VaR_Hist(series, alpha=0.05), delta=5e-4)
+        self.assertAlmostEqual(result["CVaR_95"], rp.CVaR_Hist(series, alpha=0.05), delta=5e-4)
+
+    def test_parametric_matches_the_normal_quantile(self):
+        X = make_returns()
+        w = np.full(3, 1 / 3)
+        mean, std = X.mean().to_numpy() @ w, math.sqrt(w @ X.cov().to_numpy() @ w)
+        result = monte_carlo_risk(X, equal_weights(X), "parametric", scenarios=400_000, seed=7)
+
+        self.assertAlmostEqual(result["Std_Dev"], std, delta=std * 0.01)
+        self.assertAlmostEqual(result["VaR_95"], 1.6448536 * std - mean, delta=std * 0.02)
+
+    def test_same_seed_same_result(self):
+        X = make_returns()
+        for method in ("parametric", "bootstrap"):
+            first = monte_carlo_risk(X, equal_weights(X), method, scenarios=50_000, seed=11, horizon=5)
+            second = monte_carlo_risk(X, equal_weights(X), method, scenarios=50_000, seed=11, horizon=5)
+            self.assertEqual(first, second)
+
+    def test_block_longer_than_history_is_rejected(self):
+        X = make_returns(days=20)
+        with self.assertRaises(ValueError):
+            monte_carlo_risk(X, equal_weights(X), "bootstrap", scenarios=1_000, block=21)
+
+    def test_bad_options_are_rejected(self):
+        for params in (
+            {"method": "monte"},
+            {"method": "parametric", "alpha": "0"},
+            {"method": "parametric", "alpha": "1"},
+            {"method": "parametric", "scenarios": "10"},
+            {"method": "parametric", "scenarios": "6000000"},
+            {"method": "bootstrap", "horizon": "0"},
+            {"method": "bootstrap", "horizon": "253"},
+            {"method": "bootstrap", "block": "0"},
+            {"method": "bootstrap", "seed": "-1"},
+        ):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_monte_carlo_options(params)
+        self.assertIsNone(parse_monte_carlo_options({}))
+
+
+class PortfolioRiskSimulationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("pm", password="x")
+        fund_manager = FundManager.objects.create(user=cls.user, institute=Institute.objects.create(name="I"))
+        cls.portfolio = Portfolio.objects.create(name="P", fund_manager=fund_manager)
+        prices = 100 * np.cumprod(1 + make_returns(days=60).to_numpy(), axis=0)
+        start = datetime.date(2020, 1, 1)
+        for i, symbol in enumerate(("AAA", "BBB", "CCC")):
+            bulk_upsert_history(symbol, [
+                (start + datetime.timedelta(days=day), float(prices[day, i])) for day in range(len(prices))
+            ])
+            Stock.objects.create(portfolio=cls.portfolio, symbol=symbol, name=symbol, quantity=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, query):
+        return self.client.get(f"/api/portfolio/{self.portfolio.id}/risk/?{query}")
+
+    def test_bad_options_are_400(self):
+        for query in (
+            "method=parametric&alpha=2",
+            "method=parametric&scenarios=0",
+            "method=bootstrap&horizon=300",
+            "method=bootstrap&block=0",
+            "method=bootstrap&block=60",  # 59 days of returns
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.get(query).status_code, 400)
+
+    def test_small_simulation_runs_in_the_request(self):
+        response = self.get("method=bootstrap&scenarios=10000&seed=3&horizon=5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["risk_measures"]["seed"], 3)
+
+    def test_large_simulation_is_queued(self):
+        response = self.get("method=bootstrap&scenarios=1000000&seed=3&horizon=60")
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(id=response.data["job_id"])
+        self.assertEqual(job.kind, MONTE_CARLO_RISK)
+        self.assertEqual(self.client.get(response.data["status_url"]).data["status"], Job.Status.PENDING)
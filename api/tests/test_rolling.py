@@ -0,0 +1,43 @@
+import numpy as np
+import riskfolio as rp
+from django.test import SimpleTestCase
+
+from api.portfolio.utils.rolling import downsample_indices, rolling_risk
+
+
+class RollingRiskTests(SimpleTestCase):
+    def assert_matches_full_recompute(self, returns, window, alpha):
+        result = rolling_risk(returns, window, alpha)
+        self.assertEqual(len(result["VaR"]), len(returns) - window + 1)
+        for start in range(len(returns) - window + 1):
+            sample = returns[start:start + window]
+            self.assertAlmostEqual(result["volatility"][start], sample.std(ddof=1), places=12)
+            self.assertAlmostEqual(result["VaR"][start], rp.VaR_Hist(sample, alpha=alpha), places=12)
+            self.assertAlmostEqual(result["CVaR"][start], rp.CVaR_Hist(sample, alpha=alpha), places=12)
+
+    def test_matches_full_recompute_per_window(self):
+        returns = np.random.default_rng(0).normal(0, 0.01, 400)
+        self.assert_matches_full_recompute(returns, 60, 0.05)
+        self.assert_matches_full_recompute(returns, 21, 0.01)
+
+    def test_tied_returns(self):
+        # Prices that sit still give runs of identical (zero) returns
+        returns = np.random.default_rng(1).integers(-3, 4, 300) / 100
+        self.assert_matches_full_recompute(returns, 50, 0.1)
+
+    def test_series_shorter_than_window(self):
+        result = rolling_risk(np.zeros(10), 20)
+        self.assertEqual({name: len(values) for name, values in result.items()},
+                         {"volatility": 0, "VaR": 0, "CVaR": 0})
+
+
+class DownsampleIndicesTests(SimpleTestCase):
+    def test_keeps_both_ends(self):
+        indices = downsample_indices(1000, 50)
+        self.assertLessEqual(len(indices), 50)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_short_series_is_untouched(self):
+        np.testing.assert_array_equal(downsample_indices(30, 50), np.arange(30))
+        np.testing.assert_array_equal(downsample_indices(30, None), np.arange(30))
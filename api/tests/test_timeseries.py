@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from api.portfolio.utils.timeseries import lttb_indices, parse_series_options, shape_series
+
+
+def make_series(days=1000, start="2020-01-01"):
+    return pd.Series(np.sin(np.arange(days) / 25) * 10 + 100, index=pd.date_range(start, periods=days))
+
+
+class LTTBTests(SimpleTestCase):
+    def test_keeps_ends_and_threshold(self):
+        y = np.random.default_rng(0).normal(size=500).cumsum()
+        indices = lttb_indices(np.arange(500), y, 40)
+        self.assertEqual(len(indices), 40)
+        self.assertEqual((indices[0], indices[-1]), (0, 499))
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_keeps_a_spike(self):
+        y = np.zeros(300)
+        y[123] = 50.0
+        self.assertIn(123, lttb_indices(np.arange(300), y, 10))
+
+    def test_short_input_is_untouched(self):
+        np.testing.assert_array_equal(lttb_indices(np.arange(5), np.arange(5), 10), np.arange(5))
+
+
+class ShapeSeriesTests(SimpleTestCase):
+    def test_max_points(self):
+        series = make_series()
+        self.assertEqual(len(shape_series(series, {"max_points": 50})), 50)
+        self.assertTrue(shape_series(series, {"max_points": 5000}).equals(series))
+
+    def test_range_and_resampling(self):
+        shaped = shape_series(make_series(), {"start": "2020-03-01", "end": "2020-12-31", "freq": "M"})
+        self.assertEqual(len(shaped), 10)
+        self.assertEqual(str(shaped.index[-1].date()), "2020-12-31")
+
+    def test_keep_applies_only_inside_its_window(self):
+        series = make_series()
+        keep = series.index[400:900:25]
+        shaped = shape_series(series, {"max_points": 40}, keep=keep)
+
+        inside = shaped.index[(shaped.index >= keep[0]) & (shaped.index <= keep[-1])]
+        self.assertTrue(inside.equals(keep))
+        # History before and after the window is decimated on its own, not dropped
+        self.assertEqual(shaped.index[0], series.index[0])
+        self.assertEqual(shaped.index[-1], series.index[-1])
+        self.assertLess(len(shaped), 60)
+
+    def test_bad_options(self):
+        for params in ({"freq": "D"}, {"max_points": "2"}, {"start": "2020-13-01"}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_series_options(params)